@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the offline language detector in services/language_detect.py.
+
+Runs the detector over a fixed corpus of short, voice-style utterances in the
+twelve supported languages (none of them taken from the detector's reference
+texts) and reports per-language accuracy, how many inputs would still be sent
+to Gemini at the configured confidence threshold, the accuracy of the ones
+answered locally, and the mean latency per call.
+
+Usage: python benchmarks/detect_language.py [--threshold 0.9] [--repeat 200]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services.language_detect import detect_language_locally  # noqa: E402
+
+CORPUS = {
+    "english": [
+        "How much does this jacket cost?",
+        "I am looking for a good hotel downtown.",
+        "Could you please speak a little more slowly?",
+        "My flight was delayed by two hours.",
+        "Is breakfast included in the price of the room?",
+        "I need to buy a ticket for tomorrow morning.",
+        "Do you know where I can find a pharmacy?",
+        "The museum is closed on Mondays.",
+        "Good morning, how are you doing?",
+        "We should leave early to avoid the traffic.",
+    ],
+    "spanish": [
+        "¿Cuánto cuesta esta chaqueta?",
+        "Estoy buscando un buen hotel en el centro.",
+        "¿Podría hablar un poco más despacio, por favor?",
+        "Mi vuelo se retrasó dos horas.",
+        "¿El desayuno está incluido en el precio de la habitación?",
+        "Necesito comprar un billete para mañana por la mañana.",
+        "¿Sabes dónde puedo encontrar una farmacia?",
+        "El museo está cerrado los lunes.",
+        "Buenos días, ¿cómo estás?",
+        "Deberíamos salir temprano para evitar el tráfico.",
+    ],
+    "french": [
+        "Combien coûte cette veste ?",
+        "Je cherche un bon hôtel dans le centre-ville.",
+        "Pourriez-vous parler un peu plus lentement, s'il vous plaît ?",
+        "Mon vol a été retardé de deux heures.",
+        "Le petit-déjeuner est-il compris dans le prix de la chambre ?",
+        "J'ai besoin d'acheter un billet pour demain matin.",
+        "Savez-vous où je peux trouver une pharmacie ?",
+        "Le musée est fermé le lundi.",
+        "Bonjour, comment allez-vous ?",
+        "Nous devrions partir tôt pour éviter les embouteillages.",
+    ],
+    "german": [
+        "Wie viel kostet diese Jacke?",
+        "Ich suche ein gutes Hotel in der Innenstadt.",
+        "Könnten Sie bitte etwas langsamer sprechen?",
+        "Mein Flug hatte zwei Stunden Verspätung.",
+        "Ist das Frühstück im Zimmerpreis inbegriffen?",
+        "Ich muss eine Fahrkarte für morgen früh kaufen.",
+        "Weißt du, wo ich eine Apotheke finden kann?",
+        "Das Museum ist montags geschlossen.",
+        "Guten Morgen, wie geht es dir?",
+        "Wir sollten früh losfahren, um den Verkehr zu vermeiden.",
+    ],
+    "italian": [
+        "Quanto costa questa giacca?",
+        "Sto cercando un buon albergo in centro.",
+        "Potrebbe parlare un po' più lentamente, per favore?",
+        "Il mio volo è stato ritardato di due ore.",
+        "La colazione è inclusa nel prezzo della camera?",
+        "Devo comprare un biglietto per domani mattina.",
+        "Sai dove posso trovare una farmacia?",
+        "Il museo è chiuso il lunedì.",
+        "Buongiorno, come stai?",
+        "Dovremmo partire presto per evitare il traffico.",
+    ],
+    "portuguese": [
+        "Quanto custa esta jaqueta?",
+        "Estou procurando um bom hotel no centro.",
+        "Você poderia falar um pouco mais devagar, por favor?",
+        "Meu voo atrasou duas horas.",
+        "O café da manhã está incluído no preço do quarto?",
+        "Preciso comprar uma passagem para amanhã de manhã.",
+        "Você sabe onde posso encontrar uma farmácia?",
+        "O museu fica fechado às segundas-feiras.",
+        "Bom dia, como você está?",
+        "Devemos sair cedo para evitar o trânsito.",
+    ],
+    "russian": [
+        "Сколько стоит эта куртка?",
+        "Я ищу хороший отель в центре города.",
+        "Не могли бы вы говорить немного медленнее?",
+        "Мой рейс задержали на два часа.",
+        "Завтрак включён в стоимость номера?",
+    ],
+    "japanese": [
+        "このジャケットはいくらですか？",
+        "町の中心にある良いホテルを探しています。",
+        "もう少しゆっくり話していただけますか？",
+        "私の便は二時間遅れました。",
+        "朝食は部屋の料金に含まれていますか？",
+    ],
+    "chinese": [
+        "这件夹克多少钱？",
+        "我在找市中心的一家好酒店。",
+        "请您说慢一点好吗？",
+        "我的航班延误了两个小时。",
+        "房费包含早餐吗？",
+    ],
+    "korean": [
+        "이 재킷은 얼마예요?",
+        "시내에 있는 좋은 호텔을 찾고 있어요.",
+        "조금 더 천천히 말씀해 주시겠어요?",
+        "제 비행기가 두 시간 지연되었어요.",
+        "아침 식사가 객실 요금에 포함되어 있나요?",
+    ],
+    "hindi": [
+        "इस जैकेट की कीमत कितनी है?",
+        "मैं शहर के बीच में एक अच्छा होटल ढूंढ रहा हूं।",
+        "क्या आप थोड़ा धीरे बोल सकते हैं?",
+        "मेरी उड़ान दो घंटे देर से थी।",
+        "क्या नाश्ता कमरे के किराए में शामिल है?",
+    ],
+    "arabic": [
+        "كم سعر هذه السترة؟",
+        "أبحث عن فندق جيد في وسط المدينة.",
+        "هل يمكنك التحدث ببطء أكثر من فضلك؟",
+        "تأخرت رحلتي ساعتين.",
+        "هل الإفطار مشمول في سعر الغرفة؟",
+    ],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="confidence below which Gemini is asked (default: LANGUAGE_DETECT_CONFIDENCE)")
+    parser.add_argument("--repeat", type=int, default=200, help="timing repetitions over the corpus")
+    args = parser.parse_args()
+
+    if args.threshold is None:
+        from config import LANGUAGE_DETECT_CONFIDENCE
+        args.threshold = LANGUAGE_DETECT_CONFIDENCE
+
+    samples = [(language, text) for language, texts in CORPUS.items() for text in texts]
+
+    correct = local = local_correct = 0
+    print(f"{'language':<12}{'accuracy':>10}{'local':>8}")
+    for language, texts in CORPUS.items():
+        lang_correct = lang_local = 0
+        for text in texts:
+            detected, confidence = detect_language_locally(text)
+            hit = detected == language
+            lang_correct += hit
+            if confidence >= args.threshold:
+                lang_local += 1
+                local_correct += hit
+        correct += lang_correct
+        local += lang_local
+        print(f"{language:<12}{lang_correct / len(texts):>10.0%}{lang_local:>5}/{len(texts)}")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for _, text in samples:
+            detect_language_locally(text)
+    elapsed = time.perf_counter() - start
+    calls = args.repeat * len(samples)
+
+    print()
+    print(f"overall accuracy:            {correct / len(samples):.1%} ({correct}/{len(samples)})")
+    print(f"answered locally at >= {args.threshold}: {local}/{len(samples)} "
+          f"({local_correct / local:.1%} correct)" if local else "answered locally: 0")
+    print(f"sent to Gemini:              {len(samples) - local}/{len(samples)}")
+    print(f"mean latency:                {elapsed / calls * 1e6:.1f} µs per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the AssemblyAI v3 streaming endpoint.
+
+Speaks enough of the protocol for services/stt.py: sends Begin after the
+handshake, emits a final Turn ("turn 1", "turn 2", ...) for every
+`--turn-bytes` of audio received and answers Terminate with Termination.
+`--handshake-delay` simulates the upstream connection latency that the
+transcriber pool hides.
+
+Point the app at it with ASSEMBLYAI_STREAMING_HOST=ws://127.0.0.1:<port>
+(any ASSEMBLYAI_API_KEY value is accepted).
+
+Usage: python benchmarks/fake_streaming_server.py [--port 8765] [--handshake-delay 0.3]
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import serve
+
+
+class FakeStreamingServer:
+    """Runs the fake endpoint on a background thread; use as a context manager."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, handshake_delay: float = 0.0, turn_bytes: int = 32000):
+        self.handshake_delay = handshake_delay
+        self.turn_bytes = turn_bytes
+        self.connections = 0
+        self.active = 0
+        self._lock = threading.Lock()
+        self._server = serve(self._handle, host, port, process_request=self._delay_handshake)
+        self.port = self._server.socket.getsockname()[1]
+        self.url = f"ws://{host}:{self.port}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._thread.join()
+
+    def _delay_handshake(self, connection, request):
+        time.sleep(self.handshake_delay)
+        return None
+
+    def _handle(self, websocket):
+        with self._lock:
+            self.connections += 1
+            self.active += 1
+        started = time.monotonic()
+        audio_bytes = 0
+        turns = 0
+        try:
+            websocket.send(json.dumps({
+                "type": "Begin",
+                "id": str(uuid.uuid4()),
+                "expires_at": (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat(),
+            }))
+            for message in websocket:
+                if isinstance(message, bytes):
+                    audio_bytes += len(message)
+                    while audio_bytes >= (turns + 1) * self.turn_bytes:
+                        turns += 1
+                        websocket.send(json.dumps({
+                            "type": "Turn",
+                            "turn_order": turns,
+                            "turn_is_formatted": False,
+                            "end_of_turn": True,
+                            "transcript": f"turn {turns}",
+                            "end_of_turn_confidence": 1.0,
+                            "words": [],
+                        }))
+                elif json.loads(message).get("type") == "Terminate":
+                    websocket.send(json.dumps({
+                        "type": "Termination",
+                        "audio_duration_seconds": audio_bytes // 32000,
+                        "session_duration_seconds": int(time.monotonic() - started),
+                    }))
+                    break
+        except ConnectionClosed:
+            pass
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--handshake-delay", type=float, default=0.3, help="seconds added to every handshake")
+    parser.add_argument("--turn-bytes", type=int, default=32000, help="audio bytes per emitted turn")
+    args = parser.parse_args()
+
+    with FakeStreamingServer(args.host, args.port, args.handshake_delay, args.turn_bytes) as server:
+        print(f"Fake streaming server on {server.url} (handshake delay {args.handshake_delay}s)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the DataProcessor CSV parser backends.
+
+Writes a synthetic CSV of roughly --size-mb megabytes, then parses it with each
+available backend in a fresh subprocess and reports wall-clock parse time and
+the peak resident set size of that process.
+
+Usage: python benchmarks/parse_uploads.py [--size-mb 120]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def write_csv(path: Path, size_mb: int):
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    rows_per_block = 200_000
+    with open(path, "w") as f:
+        header = True
+        while f.tell() < size_mb * 1024 * 1024:
+            block = pd.DataFrame({
+                "order_id": rng.integers(0, 10**9, rows_per_block),
+                "region": rng.choice(["north", "south", "east", "west"], rows_per_block),
+                "product": rng.choice([f"sku-{i}" for i in range(500)], rows_per_block),
+                "quantity": rng.integers(1, 50, rows_per_block),
+                "price": rng.normal(100, 25, rows_per_block).round(2),
+                "discount": rng.random(rows_per_block).round(3),
+                "order_date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows_per_block), unit="D"),
+            })
+            block.to_csv(f, index=False, header=header)
+            header = False
+
+
+def run_child(engine: str, path: str):
+    os.environ["DATA_PARSER_ENGINE"] = engine
+    sys.path.insert(0, str(ROOT))
+    from services.data_processor import DataProcessor
+
+    processor = DataProcessor()
+    with open(path, "rb") as f:
+        start = time.perf_counter()
+        df = processor._read_csv(f)
+        elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_mb, "rows": len(df)}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=120)
+    parser.add_argument("--child", nargs=2, metavar=("ENGINE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    engines = ["pandas"]
+    try:
+        import pyarrow  # noqa: F401
+        engines.append("pyarrow")
+    except ImportError:
+        print("pyarrow not installed; only the pandas backend will be measured")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "upload.csv"
+        write_csv(path, args.size_mb)
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"CSV size: {size_mb:.0f} MB")
+        print(f"{'backend':<10}{'rows':>12}{'parse (s)':>12}{'peak RSS (MB)':>16}")
+        for engine in engines:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", engine, str(path)],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip().splitlines()[-1]
+            result = json.loads(out)
+            print(f"{engine:<10}{result['rows']:>12}{result['seconds']:>12.2f}{result['peak_rss_mb']:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
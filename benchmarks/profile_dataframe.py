@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark for DataProcessor._analyze_dataframe.
+
+Compares the previous per-column profiling (describe() plus separate mean/std/
+min/max/notna passes per column) against the current analysis on a tall and a
+wide synthetic frame, then times the numeric statistics on their own:
+DataFrame.describe() against DataProcessor._profile_numeric.
+
+Usage: python benchmarks/profile_dataframe.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from services.data_processor import DataProcessor  # noqa: E402
+
+
+def per_column_profile(df: pd.DataFrame):
+    """The profiling loop _analyze_dataframe used before the vectorized engine."""
+    df.memory_usage(deep=True).sum()
+    df.isnull().sum().to_dict()
+    numeric_cols = df.select_dtypes(include=['number']).columns
+    summary = df[numeric_cols].describe().to_dict()
+    for col in numeric_cols:
+        if df[col].notna().sum() > 0:
+            df[col].mean(), df[col].std(), df[col].min(), df[col].max()
+    return summary
+
+
+def make_frame(rows: int, numeric_cols: int, text_cols: int = 2) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    data = {f"num_{i}": rng.normal(size=rows) for i in range(numeric_cols)}
+    for i in range(text_cols):
+        data[f"cat_{i}"] = rng.choice(["north", "south", "east", "west"], size=rows)
+    df = pd.DataFrame(data)
+    # Sprinkle missing values
+    df.iloc[::97, 0] = np.nan
+    return df
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    processor = DataProcessor()
+    cases = {
+        "tall (2,000,000 x 6)": make_frame(2_000_000, 4),
+        "wide (20,000 x 502)": make_frame(20_000, 500),
+    }
+    print(f"{'frame':<24}{'per-column (s)':>16}{'current (s)':>16}{'speedup':>10}")
+    for name, df in cases.items():
+        before = best_of(lambda: per_column_profile(df))
+        after = best_of(lambda: processor._analyze_dataframe(df, name))
+        print(f"{name:<24}{before:>16.3f}{after:>16.3f}{before / after:>9.1f}x")
+
+    print()
+    print(f"{'numeric stats only':<24}{'describe() (s)':>16}{'profile (s)':>16}{'speedup':>10}")
+    for name, df in cases.items():
+        numeric_cols = df.select_dtypes(include=['number']).columns
+        before = best_of(lambda: df[numeric_cols].describe())
+        after = best_of(lambda: processor._profile_numeric(df, numeric_cols))
+        print(f"{name:<24}{before:>16.3f}{after:>16.3f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the pre-warmed AssemblyAI transcriber pool.
+
+Starts benchmarks/fake_streaming_server.py in-process with a simulated
+handshake delay, then opens --sessions voice sessions the way the /ws handlers
+do: once with the pool disabled (every session connects on demand) and once
+with --pool-size warm sessions. The pool only keeps sessions warm while a
+voice socket is open, so the pooled run holds one extra session open for its
+whole duration, as another connected user would. For each session it reports
+how long the handler waited before it could stream its first audio frame, and
+checks that a final transcript comes back through the (possibly reused) session.
+
+Usage: python benchmarks/transcriber_pool.py [--sessions 10] [--pool-size 2] [--handshake-delay 0.3]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fake_streaming_server import FakeStreamingServer  # noqa: E402
+
+
+async def run_sessions(pool, sessions: int, gap: float, hold_one: bool = False):
+    """Returns (seconds until first frame per session, sessions that got their transcript)."""
+    held = await pool.acquire() if hold_one else None
+    while hold_one and pool.stats()["idle"] < pool.size:
+        await asyncio.sleep(0.05)
+    waits = []
+    transcribed = 0
+    for _ in range(sessions):
+        final = threading.Event()
+        start = time.perf_counter()
+        transcriber = await pool.acquire(on_final_callback=lambda text: final.set())
+        waits.append(time.perf_counter() - start)
+        # One second of 16 kHz 16-bit silence; the fake server answers with a turn
+        transcriber.stream_audio(b"\0" * 32000)
+        transcribed += await asyncio.get_running_loop().run_in_executor(None, final.wait, 5)
+        await pool.release(transcriber)
+        # Time between voice sessions, during which the pool refills
+        await asyncio.sleep(gap)
+    if held is not None:
+        await pool.release(held)
+    return waits, transcribed
+
+
+def report(label: str, waits, transcribed: int, sessions: int):
+    print(f"{label:<10} mean {statistics.mean(waits) * 1000:7.1f} ms   "
+          f"max {max(waits) * 1000:7.1f} ms   transcripts {transcribed}/{sessions}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pre-warmed transcriber pool")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--handshake-delay", type=float, default=0.3)
+    parser.add_argument("--gap", type=float, default=0.5, help="seconds between sessions")
+    args = parser.parse_args()
+
+    with FakeStreamingServer(handshake_delay=args.handshake_delay) as server:
+        os.environ["ASSEMBLYAI_STREAMING_HOST"] = server.url
+        os.environ.setdefault("ASSEMBLYAI_API_KEY", "fake-key")
+        from services.transcriber_pool import TranscriberPool
+
+        cold = TranscriberPool(0, 60)
+        waits, transcribed = asyncio.run(run_sessions(cold, args.sessions, args.gap))
+        report("no pool", waits, transcribed, args.sessions)
+
+        warm = TranscriberPool(args.pool_size, 60)
+        warm.start()
+        waits, transcribed = asyncio.run(run_sessions(warm, args.sessions, args.gap, hold_one=True))
+        warm.stop()
+        report("pooled", waits, transcribed, args.sessions)
+        print(f"pool hits/misses: {warm.hits}/{warm.misses}, upstream connections: {server.connections}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,14 @@ from dotenv import load_dotenv
 import assemblyai as aai
 import google.generativeai as genai
 import logging
-from typing import Dict, Optional
+import threading
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+from services.shared_state import SharedState
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,18 +23,192 @@ _api_keys = {
     "GEMINI_API_KEY": os.getenv("GEMINI_API_KEY")
 }
 
+# Server worker processes (start.py). With more than one, API keys set at
+# runtime and session datasets are shared between workers through STATE_DIR.
+WORKERS = int(os.getenv("WORKERS", "1"))
+MULTI_WORKER = WORKERS > 1
+
+# Private server state (shared worker state, parsed dataset store, spilled
+# datasets, TTS cache). Kept outside uploads/, which is served publicly.
+STATE_DIR = Path(os.getenv("STATE_DIR", str(Path(__file__).resolve().parent / "state")))
+
+# TTS synthesis concurrency: a process-wide cap shared by all connections to
+# stay within Murf rate limits, and the default cap for a single connection.
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "4"))
+TTS_CONNECTION_CONCURRENCY = int(os.getenv("TTS_CONNECTION_CONCURRENCY", "2"))
+
+# Synthesized speech cache limits (bytes) for the memory and disk tiers
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+
+# Generated audio served at /audio/{id}: memory tier and disk tier limits (bytes)
+# and how long a clip stays available after it was last generated
+AUDIO_STORE_MEMORY_BYTES = int(os.getenv("AUDIO_STORE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+AUDIO_STORE_DISK_BYTES = int(os.getenv("AUDIO_STORE_DISK_BYTES", str(256 * 1024 * 1024)))
+AUDIO_STORE_TTL_SECONDS = int(os.getenv("AUDIO_STORE_TTL_SECONDS", "3600"))
+
+# CSV uploads larger than this are ingested in chunks with online statistics,
+# keeping only a row sample bounded by CSV_SAMPLE_MEMORY_BYTES in memory
+CSV_STREAMING_THRESHOLD_BYTES = int(os.getenv("CSV_STREAMING_THRESHOLD_BYTES", str(50 * 1024 * 1024)))
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "100000"))
+CSV_SAMPLE_MEMORY_BYTES = int(os.getenv("CSV_SAMPLE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+
+# Uploads are written to disk as the request body arrives and rejected past UPLOAD_MAX_BYTES
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Worker processes for PDF page extraction (1 disables the pool)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+
+# PDF budgets: pages read, characters of text kept, and raw tables retained
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "500"))
+PDF_MAX_TEXT_CHARS = int(os.getenv("PDF_MAX_TEXT_CHARS", "200000"))
+PDF_MAX_TABLES = int(os.getenv("PDF_MAX_TABLES", "20"))
+
+# Combined size of per-session datasets kept in memory before the least
+# recently used ones are spilled to disk
+DATASET_MEMORY_BUDGET_BYTES = int(os.getenv("DATASET_MEMORY_BUDGET_BYTES", str(512 * 1024 * 1024)))
+# Sessions kept per worker: idle ones are dropped after DATASET_SESSION_IDLE_SECONDS,
+# the least recently used beyond DATASET_MAX_SESSIONS, and spilled ones once
+# the spill files exceed DATASET_SPILL_MAX_BYTES (stored uploads reload on next use)
+DATASET_SESSION_IDLE_SECONDS = int(os.getenv("DATASET_SESSION_IDLE_SECONDS", "3600"))
+DATASET_MAX_SESSIONS = int(os.getenv("DATASET_MAX_SESSIONS", "256"))
+DATASET_SPILL_MAX_BYTES = int(os.getenv("DATASET_SPILL_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Disk space for parsed uploads cached by content hash (STATE_DIR/dataset_store)
+DATASET_STORE_MAX_BYTES = int(os.getenv("DATASET_STORE_MAX_BYTES", str(384 * 1024 * 1024)))
+# Seconds a session's record of its last dataset is kept after it was last written
+DATASET_SESSION_TTL_SECONDS = int(os.getenv("DATASET_SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Conversation history per connection: estimated token budget, turns always kept
+# verbatim, and the size cap of the rolling summary older turns are folded into
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+CHAT_HISTORY_RECENT_TURNS = int(os.getenv("CHAT_HISTORY_RECENT_TURNS", "4"))
+CHAT_SUMMARY_MAX_CHARS = int(os.getenv("CHAT_SUMMARY_MAX_CHARS", "1500"))
+
+# Translation cache: entries kept (LRU) and how long a translation stays valid
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "2048"))
+TRANSLATION_CACHE_TTL_SECONDS = int(os.getenv("TRANSLATION_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Offline language detection results at or above this confidence skip the Gemini call
+LANGUAGE_DETECT_CONFIDENCE = float(os.getenv("LANGUAGE_DETECT_CONFIDENCE", "0.9"))
+
+# Let Gemini plan a structured query (filter/group-by/aggregate) over the loaded
+# dataset, executed locally, before answering data questions it cannot see rows for
+DATA_QUERY_PLANNING = os.getenv("DATA_QUERY_PLANNING", "true").lower() == "true"
+
+# Upload parser backend: "auto" uses pyarrow (multithreaded, Arrow-backed dtypes)
+# when installed, "pyarrow" requests it explicitly, "pandas" forces the default parsers
+DATA_PARSER_ENGINE = os.getenv("DATA_PARSER_ENGINE", "auto").lower()
+
+# Bounded thread pools for blocking provider calls made by the HTTP endpoints:
+# concurrent calls per provider, and how many more may queue before requests
+# are rejected with 503. The WebSocket voice pipelines do not use these pools.
+GEMINI_EXECUTOR_WORKERS = int(os.getenv("GEMINI_EXECUTOR_WORKERS", "8"))
+GEMINI_EXECUTOR_QUEUE = int(os.getenv("GEMINI_EXECUTOR_QUEUE", "32"))
+MURF_EXECUTOR_WORKERS = int(os.getenv("MURF_EXECUTOR_WORKERS", "4"))
+MURF_EXECUTOR_QUEUE = int(os.getenv("MURF_EXECUTOR_QUEUE", "16"))
+ASSEMBLYAI_EXECUTOR_WORKERS = int(os.getenv("ASSEMBLYAI_EXECUTOR_WORKERS", "2"))
+ASSEMBLYAI_EXECUTOR_QUEUE = int(os.getenv("ASSEMBLYAI_EXECUTOR_QUEUE", "8"))
+DATA_EXECUTOR_WORKERS = int(os.getenv("DATA_EXECUTOR_WORKERS", "2"))
+DATA_EXECUTOR_QUEUE = int(os.getenv("DATA_EXECUTOR_QUEUE", "8"))
+
+# AssemblyAI streaming host (a ws:// URL points the client at a local test server),
+# connected streaming sessions kept warm for new voice WebSockets while any voice
+# WebSocket is open (0, the default, disables the pool; warm sessions are billed
+# like used ones), and seconds an unused warm session is kept before it is replaced
+ASSEMBLYAI_STREAMING_HOST = os.getenv("ASSEMBLYAI_STREAMING_HOST", "streaming.assemblyai.com")
+STT_POOL_SIZE = int(os.getenv("STT_POOL_SIZE", "0"))
+STT_POOL_MAX_IDLE_SECONDS = float(os.getenv("STT_POOL_MAX_IDLE_SECONDS", "60"))
+
+# Upper bound on pooled keep-alive connections per provider HTTP client
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+
+# Callbacks notified with the names of keys changed by set_api_keys
+_key_change_listeners: List[Callable[[Set[str]], None]] = []
+
+# In multi-worker mode, keys set through one worker are published to the others
+_shared_state = SharedState(STATE_DIR / "shared_state.sqlite3") if MULTI_WORKER else None
+_shared_sync_lock = threading.Lock()
+
+# Held for the life of the process by check_worker_mode()
+_instance_lock_file = None
+
+def check_worker_mode():
+    """
+    Warn when another server process uses the same STATE_DIR without WORKERS
+    set, e.g. `uvicorn main:app --workers 4`: each process would keep its own
+    API keys and session datasets, so requests would see different state
+    depending on the worker that serves them.
+    """
+    global _instance_lock_file
+    if MULTI_WORKER or fcntl is None or _instance_lock_file is not None:
+        return
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    lock_file = open(STATE_DIR / "server.lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        logging.warning(
+            "Another server process is using this STATE_DIR but WORKERS is not set; "
+            "workers will not share API keys or datasets. Start with WORKERS=N python start.py "
+            "(or set WORKERS to the uvicorn --workers count)."
+        )
+        return
+    _instance_lock_file = lock_file
+
+def register_key_change_listener(listener: Callable[[Set[str]], None]):
+    """Register a callback invoked with the set of key names whenever they change."""
+    _key_change_listeners.append(listener)
+
+def _notify_key_change(changed: Set[str]):
+    for listener in _key_change_listeners:
+        try:
+            listener(changed)
+        except Exception as e:
+            logging.error(f"API key change listener failed: {e}")
+
+def _sync_shared_keys():
+    """Pick up keys another worker has set since the last check."""
+    if _shared_state is None or not _shared_state.has_changed():
+        return
+    with _shared_sync_lock:
+        changed = set()
+        for key, value in _shared_state.get_all("api_keys").items():
+            if value and _api_keys.get(key) != value:
+                _api_keys[key] = value
+                changed.add(key)
+    if changed:
+        configure_apis()
+        _notify_key_change(changed)
+
+def reset_shared_state():
+    """Clear keys shared by a previous server run; the launcher calls this before starting workers."""
+    if _shared_state is not None:
+        _shared_state.clear()
+
 def set_api_keys(api_keys: Dict[str, str]):
     """Update API keys from user input."""
     global _api_keys
+    changed = set()
     for key, value in api_keys.items():
         if value and value.strip():
+            if _api_keys.get(key) != value.strip():
+                changed.add(key)
             _api_keys[key] = value.strip()
     
     # Reconfigure APIs with new keys
     configure_apis()
 
+    # Let services drop clients built with the old keys
+    if changed:
+        if _shared_state is not None:
+            _shared_state.set_many("api_keys", {key: _api_keys[key] for key in changed})
+        _notify_key_change(changed)
+
 def get_api_key(key: str) -> Optional[str]:
     """Get API key by name."""
+    _sync_shared_keys()
     return _api_keys.get(key)
 
 def configure_apis():
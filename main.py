@@ -1,25 +1,45 @@
 # main.py
-from fastapi import FastAPI, Request, WebSocket, UploadFile, File, HTTPException
+from fastapi import FastAPI, Request, WebSocket, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
 import logging
 import asyncio
 import base64
-import re
 
 # Import services and config
 import config
 from services import stt, llm, tts
-from services.data_processor import data_processor
-from services.translator import translate_text, get_supported_languages
+from services.dataset_registry import dataset_registry, normalize_session_id
+from services.dataset_store import dataset_store
+from services.conversation import ConversationHistory
+from services.structured_query import may_need_query
+from services.executors import gemini_executor, murf_executor, assemblyai_executor, data_executor, provider_executors
+from services.audio_frames import AudioSender, FRAME_VERSION
+from services.audio_cache import tts_cache
+from services.audio_store import audio_store, parse_range
+from services.transcriber_pool import transcriber_pool
+from services.uploads import receive_upload, discard_spooled, UploadError, UploadTooLarge
+from services.translator import translate_text, translate_batch, translate_to_languages, get_supported_languages
+from services.translation_cache import translation_cache
 from services.voice_changer import apply_voice_effects, get_available_personas
 from personas import get_persona, get_available_personas as get_persona_list, get_persona_display_info
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keeps warm streaming transcription sessions for the voice WebSockets while the app runs."""
+    config.check_worker_mode()
+    transcriber_pool.start()
+    yield
+    await asyncio.get_running_loop().run_in_executor(None, transcriber_pool.stop)
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Mount static files for CSS/JS
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -27,6 +47,147 @@ app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 templates = Jinja2Templates(directory="templates")
 
 
+async def stream_reply_audio(audio_sender: AudioSender, chunks, concurrency: int = None) -> str:
+    """
+    Streams LLM text through incremental sentence detection into TTS.
+
+    The blocking LLM stream is drained on a worker thread, so audio for the first
+    sentence is synthesized while the model is still generating the rest. Up to
+    `concurrency` sentences are synthesized at once; audio is still sent in
+    sentence order. Returns the full response text.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def produce():
+        try:
+            for chunk in chunks:
+                loop.call_soon_threadsafe(queue.put_nowait, chunk)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    producer = loop.run_in_executor(None, produce)
+    pipeline = tts.SynthesisPipeline(audio_sender.send, concurrency)
+    splitter = llm.SentenceSplitter()
+    parts = []
+
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            parts.append(chunk)
+            for sentence in splitter.feed(chunk):
+                pipeline.submit(sentence)
+
+        remainder = splitter.flush()
+        if remainder:
+            pipeline.submit(remainder)
+
+        await producer
+        await pipeline.drain()
+    except BaseException:
+        pipeline.cancel()
+        raise
+
+    return "".join(parts).strip()
+
+
+async def run_blocking(executor, fn, *args):
+    """Runs a blocking call on a provider executor, or on the loop's default executor when None."""
+    if executor is None:
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+    return await executor.run(fn, *args)
+
+
+async def run_planned_query(processor, text: str, llm_executor=None, query_executor=None):
+    """
+    Has Gemini plan a structured query for a data question and executes it on the
+    session's full DataFrame. Returns the compact result text for the answering
+    prompt, or None when planning is disabled, no data is loaded, the question
+    does not look like a data question, or no query fits.
+
+    The WebSocket pipelines use the default executor; HTTP endpoints pass their
+    provider executors.
+    """
+    if not config.DATA_QUERY_PLANNING:
+        return None
+    schema = processor.get_query_schema()
+    if not schema or not may_need_query(text, schema):
+        return None
+    plan = await run_blocking(llm_executor, llm.plan_data_query, text, schema)
+    if plan is None:
+        return None
+    return await run_blocking(query_executor, processor.run_structured_query, plan)
+
+
+def load_or_process_upload(data_processor, upload_path, filename: str, digest: str):
+    """
+    Restores an upload from the dataset store by its content digest, or parses
+    and profiles it. Returns (digest, result, stored) where stored is None on a miss.
+    """
+    stored = dataset_store.load(digest)
+    if stored is not None:
+        df, stored_result = stored
+        return digest, data_processor.restore_result(df, stored_result, filename), stored
+    return digest, data_processor.process_file(upload_path, filename), None
+
+
+async def stream_speech(text: str, metadata: dict) -> StreamingResponse:
+    """
+    Synthesizes text on the Murf executor and streams the audio to the client
+    as it arrives, so playback can start before synthesis finishes. Failures
+    before the first chunk still surface as HTTP errors.
+
+    The body starts with one line of JSON (`metadata` plus the reply text, which
+    can be too long for a header), followed by the WAV audio.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def on_chunk(chunk: bytes):
+        loop.call_soon_threadsafe(queue.put_nowait, chunk)
+
+    synthesis = asyncio.ensure_future(murf_executor.run(tts.speak, text, on_chunk=on_chunk))
+    # Chunks are queued from the worker thread before the call returns, so None always comes last
+    synthesis.add_done_callback(lambda _: queue.put_nowait(None))
+
+    first_chunk = await queue.get()
+    if first_chunk is None and not synthesis.result():
+        raise HTTPException(status_code=500, detail="Speech synthesis failed")
+
+    async def body():
+        yield (json.dumps({**metadata, "response": text}) + "\n").encode("utf-8")
+        chunk = first_chunk
+        while chunk is not None:
+            yield chunk
+            chunk = await queue.get()
+        if not synthesis.cancelled() and synthesis.exception() is not None:
+            logging.error(f"Speech stream ended early: {synthesis.exception()}")
+
+    return StreamingResponse(body(), media_type="application/octet-stream")
+
+
+def get_tts_concurrency(websocket: WebSocket):
+    """Per-connection TTS concurrency from the `tts_concurrency` query parameter."""
+    value = websocket.query_params.get("tts_concurrency")
+    if value and value.isdigit():
+        return int(value)
+    return None
+
+
+async def negotiate_audio_sender(websocket: WebSocket) -> AudioSender:
+    """
+    Picks the audio framing for a connection from the `audio_framing` query
+    parameter. Clients asking for "binary" get raw audio in binary frames and a
+    confirmation event; everyone else keeps base64-in-JSON audio messages.
+    """
+    binary = websocket.query_params.get("audio_framing") == "binary"
+    if binary:
+        await websocket.send_json({"type": "audio_framing", "mode": "binary", "version": FRAME_VERSION})
+    return AudioSender(websocket, binary=binary)
+
+
 @app.get("/")
 @app.head("/")
 async def home(request: Request):
@@ -41,6 +202,60 @@ async def health_check():
     return {"status": "healthy", "message": "Voice Agent API is running"}
 
 
+@app.get("/tts/cache/stats")
+async def tts_cache_stats():
+    """Hit/miss counters and tier sizes for the synthesized speech cache."""
+    return JSONResponse(content=tts_cache.stats())
+
+
+@app.get("/translate/cache/stats")
+async def translation_cache_stats():
+    """Hit/miss counters and size of the translation cache."""
+    return JSONResponse(content=translation_cache.stats())
+
+
+@app.get("/executors/stats")
+async def executor_stats():
+    """Concurrency, queue depth and rejection counters of the provider executors."""
+    return JSONResponse(content={name: executor.stats() for name, executor in provider_executors.items()})
+
+
+@app.get("/stt/pool/stats")
+async def transcriber_pool_stats():
+    """Warm streaming sessions and pool hit/miss counters."""
+    return JSONResponse(content=transcriber_pool.stats())
+
+
+@app.get("/audio/stats")
+async def audio_store_stats():
+    """Hit/miss counters and memory usage of the generated audio store."""
+    return JSONResponse(content=audio_store.stats())
+
+
+@app.get("/audio/{clip_id}")
+async def get_audio(clip_id: str, request: Request):
+    """Serves a generated audio clip by ID, honouring single byte-range requests."""
+    # A clip no longer in memory is read from disk
+    clip = await asyncio.get_running_loop().run_in_executor(None, audio_store.get, clip_id)
+    if clip is None:
+        raise HTTPException(status_code=404, detail="Audio not found or expired")
+    data, content_type = clip
+    # IDs are content hashes, so a clip never changes while it exists
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": f"private, max-age={config.AUDIO_STORE_TTL_SECONDS}, immutable"}
+    
+    range_header = request.headers.get("range")
+    if range_header is None:
+        return Response(content=data, media_type=content_type, headers=headers)
+    
+    byte_range = parse_range(range_header, len(data))
+    if byte_range is None:
+        headers["Content-Range"] = f"bytes */{len(data)}"
+        return Response(status_code=416, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+    return Response(content=data[start:end + 1], status_code=206, media_type=content_type, headers=headers)
+
+
 @app.get("/multilingual-voice-agent")
 async def multilingual_voice_agent_page(request: Request):
     """Serves the Multilingual Voice Agent page."""
@@ -54,31 +269,44 @@ async def persona_voice_agent_page(request: Request):
 
 
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
-    """Handle file upload and process data."""
+async def upload_file(request: Request, session_id: str = None):
+    """Handle file upload (multipart field "file") and process data."""
     try:
-        # Validate file type
+        # Write the upload to disk as it arrives and let the parsers read it from
+        # there; unsupported file types are rejected before their data is read
         allowed_extensions = {'.csv', '.pdf', '.xlsx', '.xls'}
-        file_extension = file.filename.split('.')[-1].lower()
-        
-        if f'.{file_extension}' not in allowed_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
-            )
-        
-        # Read file content
-        file_content = await file.read()
-        
-        # Process file
-        result = data_processor.process_file(file_content, file.filename)
+        try:
+            upload = await receive_upload(request, "file", allowed_suffixes=allowed_extensions)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except UploadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        upload_path = upload.path
+        
+        # Process file into this session's dataset; identical content is served
+        # from the dataset store without re-parsing, re-profiling or the LLM
+        data_processor = await data_executor.run(dataset_registry.get, session_id)
+        try:
+            digest, result, stored = await data_executor.run(load_or_process_upload, data_processor, upload_path, upload.filename, upload.sha256)
+        finally:
+            discard_spooled(upload_path)
         
         if not result["success"]:
+            await data_executor.run(dataset_registry.update_usage, session_id)
             raise HTTPException(status_code=400, detail=result["error"])
         
-        # Generate AI insights
-        insights = llm.analyze_data_with_llm(result)
-        result["ai_insights"] = insights
+        if stored is None or result.get("ai_insights") in llm.ANALYSIS_FALLBACK_MESSAGES:
+            # Generate AI insights (again, if the stored copy only has a fallback message)
+            insights = await gemini_executor.run(llm.analyze_data_with_llm, result)
+            result["ai_insights"] = insights
+            
+            # Stored even without insights so every worker can load the dataset; a
+            # later upload of the same content retries them. A hit only rewrites the result.
+            df = data_processor.current_data if stored is None and result.get("file_type") != "PDF" else None
+            await data_executor.run(dataset_store.save, digest, df, result)
+        
+        entry = await data_executor.run(dataset_store.remember_session, normalize_session_id(session_id), digest, upload.filename)
+        await data_executor.run(dataset_registry.update_usage, session_id, loaded=entry)
         
         return JSONResponse(content=result)
         
@@ -96,39 +324,40 @@ async def websocket_endpoint(websocket: WebSocket):
     logging.info("WebSocket client connected.")
 
     loop = asyncio.get_event_loop()
-    chat_history = []
+    # Token-budgeted; old turns are folded into a rolling summary
+    chat_history = ConversationHistory()
+    tts_concurrency = get_tts_concurrency(websocket)
+    session_id = websocket.query_params.get("session_id")
+    audio_sender = await negotiate_audio_sender(websocket)
 
     async def handle_transcript(text: str):
         """Processes the final transcript, gets LLM and TTS responses, and streams audio."""
         await websocket.send_json({"type": "final", "text": text})
         try:
-            # Get data context if available
-            data_context = data_processor.get_analysis_context()
-            
-            # 1. Get the full text response from the LLM (non-streaming)
-            full_response, updated_history = llm.get_llm_response(text, chat_history, data_context)
-            
-            # Update history for the next turn
-            chat_history.clear()
-            chat_history.extend(updated_history)
+            # The default executor, so voice turns never queue behind uploads on data_executor
+            processor = await run_blocking(None, dataset_registry.get, session_id)
+
+            # Simple aggregate questions are answered from the DataFrame, skipping the LLM
+            local_answer = await run_blocking(None, processor.answer_locally, text)
+            if local_answer is not None:
+                full_response = await stream_reply_audio(audio_sender, [local_answer], tts_concurrency)
+                llm.record_turn(chat_history, text, full_response)
+            else:
+                # Get data context for this session's dataset if available
+                data_context = processor.get_analysis_context()
+                query_result = await run_planned_query(processor, text)
+
+                # Stream the LLM response sentence by sentence into TTS.
+                # The turn is recorded in chat_history once the stream completes.
+                full_response = await stream_reply_audio(
+                    audio_sender,
+                    llm.stream_llm_response(text, chat_history, data_context, query_result),
+                    tts_concurrency
+                )
 
             # Send the full text response to the UI
             await websocket.send_json({"type": "assistant", "text": full_response})
 
-            # 2. Split the response into sentences
-            sentences = re.split(r'(?<=[.?!])\s+', full_response.strip())
-            
-            # 3. Process each sentence for TTS and stream audio back
-            for sentence in sentences:
-                if sentence.strip():
-                    # Run the blocking TTS function in a separate thread
-                    audio_bytes = await loop.run_in_executor(
-                        None, tts.speak, sentence.strip()
-                    )
-                    if audio_bytes:
-                        b64_audio = base64.b64encode(audio_bytes).decode('utf-8')
-                        await websocket.send_json({"type": "audio", "b64": b64_audio})
-
         except Exception as e:
             logging.error(f"Error in LLM/TTS pipeline: {e}")
             await websocket.send_json({"type": "llm", "text": "Sorry, I encountered an error."})
@@ -140,7 +369,7 @@ async def websocket_endpoint(websocket: WebSocket):
 
     transcriber = None
     try:
-        transcriber = stt.AssemblyAIStreamingTranscriber(on_final_callback=on_final_transcript)
+        transcriber = await transcriber_pool.acquire(on_final_callback=on_final_transcript)
         
         while True:
             data = await websocket.receive_bytes()
@@ -149,7 +378,7 @@ async def websocket_endpoint(websocket: WebSocket):
         logging.info(f"WebSocket connection closed: {e}")
     finally:
         if transcriber:
-            transcriber.close()
+            await transcriber_pool.release(transcriber)
         logging.info("Transcription resources released.")
 
 
@@ -160,7 +389,11 @@ async def persona_websocket_endpoint(websocket: WebSocket):
     logging.info("Persona WebSocket client connected.")
 
     loop = asyncio.get_event_loop()
-    chat_history = []
+    # Token-budgeted; old turns are folded into a rolling summary
+    chat_history = ConversationHistory()
+    tts_concurrency = get_tts_concurrency(websocket)
+    session_id = websocket.query_params.get("session_id")
+    audio_sender = await negotiate_audio_sender(websocket)
     current_persona = "girl"  # Default persona
 
     async def handle_transcript(text: str):
@@ -170,33 +403,21 @@ async def persona_websocket_endpoint(websocket: WebSocket):
             # Get persona configuration
             persona_config = get_persona(current_persona)
             
-            # Get data context if available
-            data_context = data_processor.get_analysis_context()
+            # Get data context for this session's dataset if available
+            processor = await run_blocking(None, dataset_registry.get, session_id)
+            data_context = processor.get_analysis_context()
+            query_result = await run_planned_query(processor, text)
             
-            # Get persona-based LLM response
-            full_response, updated_history = llm.get_persona_response(
-                text, chat_history, data_context, persona_config
+            # Stream the persona-based LLM response sentence by sentence into TTS
+            full_response = await stream_reply_audio(
+                audio_sender,
+                llm.stream_persona_response(text, chat_history, data_context, persona_config, query_result),
+                tts_concurrency
             )
-            
-            # Update history for the next turn
-            chat_history.clear()
-            chat_history.extend(updated_history)
 
             # Send the full text response to the UI
             await websocket.send_json({"type": "assistant", "text": full_response})
 
-            # Split the response into sentences and generate audio
-            sentences = re.split(r'(?<=[.?!])\s+', full_response.strip())
-            
-            for sentence in sentences:
-                if sentence.strip():
-                    audio_bytes = await loop.run_in_executor(
-                        None, tts.speak, sentence.strip()
-                    )
-                    if audio_bytes:
-                        b64_audio = base64.b64encode(audio_bytes).decode('utf-8')
-                        await websocket.send_json({"type": "audio", "b64": b64_audio})
-
         except Exception as e:
             logging.error(f"Error in persona LLM/TTS pipeline: {e}")
             await websocket.send_json({"type": "assistant", "text": "Sorry, I encountered an error."})
@@ -207,7 +428,7 @@ async def persona_websocket_endpoint(websocket: WebSocket):
 
     transcriber = None
     try:
-        transcriber = stt.AssemblyAIStreamingTranscriber(on_final_callback=on_final_transcript)
+        transcriber = await transcriber_pool.acquire(on_final_callback=on_final_transcript)
         
         while True:
             message = await websocket.receive()
@@ -230,7 +451,7 @@ async def persona_websocket_endpoint(websocket: WebSocket):
         logging.info(f"Persona WebSocket connection closed: {e}")
     finally:
         if transcriber:
-            transcriber.close()
+            await transcriber_pool.release(transcriber)
         logging.info("Persona transcription resources released.")
 
 
@@ -247,7 +468,7 @@ async def multilingual_voice_agent(request: Request):
             raise HTTPException(status_code=400, detail="Text is required")
         
         # Step 1: Translate the text
-        translation_result = translate_text(text, target_language)
+        translation_result = await gemini_executor.run(translate_text, text, target_language)
         
         if not translation_result.get("success"):
             raise HTTPException(status_code=400, detail=translation_result.get("error"))
@@ -255,18 +476,19 @@ async def multilingual_voice_agent(request: Request):
         translated_text = translation_result["translated_text"]
         
         # Step 2: Generate voice with persona
-        audio_bytes = apply_voice_effects(
+        audio_bytes = await murf_executor.run(
+            apply_voice_effects,
             text=translated_text,
             persona=persona,
-            language=target_language,
-            output_file=f"multilingual_{persona}_{target_language}.wav"
+            language=target_language
         )
         
         if not audio_bytes:
             raise HTTPException(status_code=500, detail="Voice generation failed")
         
-        # Step 3: Return response with audio
-        b64_audio = base64.b64encode(audio_bytes).decode('utf-8')
+        # Step 3: Return response with a link to the stored audio
+        # Hashes the clip and, with several workers, writes it to disk before returning
+        clip_id = await asyncio.get_running_loop().run_in_executor(None, audio_store.put, audio_bytes)
         
         return JSONResponse(content={
             "success": True,
@@ -274,7 +496,7 @@ async def multilingual_voice_agent(request: Request):
             "translated_text": translated_text,
             "target_language": target_language,
             "persona": persona,
-            "audio_url": f"/uploads/multilingual_{persona}_{target_language}.wav"
+            "audio_url": f"/audio/{clip_id}"
         })
         
     except HTTPException:
@@ -284,29 +506,64 @@ async def multilingual_voice_agent(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/translate/batch")
+async def translate_batch_endpoint(request: Request):
+    """
+    Translate several segments into one language ({"texts": [...], "target_language": ...})
+    or one text into several languages ({"text": ..., "target_languages": [...]})
+    with a single model call.
+    """
+    try:
+        data = await request.json()
+        texts = data.get("texts")
+        if texts is not None:
+            if not isinstance(texts, list) or not all(isinstance(t, str) and t.strip() for t in texts):
+                raise HTTPException(status_code=400, detail="texts must be a list of non-empty strings")
+            target_language = data.get("target_language", "japanese").lower()
+            results = await gemini_executor.run(translate_batch, texts, target_language)
+            return JSONResponse(content={"success": True, "results": results})
+        
+        text = (data.get("text") or "").strip()
+        target_languages = data.get("target_languages")
+        if not text or not isinstance(target_languages, list) or not target_languages:
+            raise HTTPException(status_code=400, detail="Provide texts and target_language, or text and target_languages")
+        results = await gemini_executor.run(translate_to_languages, text, [str(language).lower() for language in target_languages])
+        return JSONResponse(content={"success": True, "results": results})
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Batch translation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/process_voice_translation")
 async def process_voice_translation(
-    audio: UploadFile = File(...),
+    request: Request,
     target_language: str = "japanese",
     persona: str = "normal"
 ):
-    """Process voice recording, transcribe, translate, and generate voice response."""
+    """Process voice recording (multipart field "audio"), transcribe, translate, and generate voice response."""
     try:
-        # Save uploaded audio
-        audio_content = await audio.read()
-        audio_path = f"uploads/recorded_audio.wav"
-        
-        with open(audio_path, "wb") as f:
-            f.write(audio_content)
+        # Save uploaded audio as it is received
+        try:
+            audio_path = (await receive_upload(request, "audio")).path
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except UploadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         # Step 1: Transcribe audio to text
-        original_text = stt.transcribe_audio_file(audio_path)
+        try:
+            original_text = await assemblyai_executor.run(stt.transcribe_audio_file, str(audio_path))
+        finally:
+            discard_spooled(audio_path)
         
         if not original_text:
             raise HTTPException(status_code=400, detail="Could not transcribe audio")
         
         # Step 2: Translate the text
-        translation_result = translate_text(original_text, target_language)
+        translation_result = await gemini_executor.run(translate_text, original_text, target_language)
         
         if not translation_result.get("success"):
             raise HTTPException(status_code=400, detail=translation_result.get("error"))
@@ -314,23 +571,26 @@ async def process_voice_translation(
         translated_text = translation_result["translated_text"]
         
         # Step 3: Generate voice with persona
-        audio_bytes = apply_voice_effects(
+        audio_bytes = await murf_executor.run(
+            apply_voice_effects,
             text=translated_text,
             persona=persona,
-            language=target_language,
-            output_file=f"voice_translation_{persona}_{target_language}.wav"
+            language=target_language
         )
         
         if not audio_bytes:
             raise HTTPException(status_code=500, detail="Voice generation failed")
         
+        # Hashes the clip and, with several workers, writes it to disk before returning
+        clip_id = await asyncio.get_running_loop().run_in_executor(None, audio_store.put, audio_bytes)
+        
         return JSONResponse(content={
             "success": True,
             "original_text": original_text,
             "translated_text": translated_text,
             "target_language": target_language,
             "persona": persona,
-            "audio_url": f"/uploads/voice_translation_{persona}_{target_language}.wav"
+            "audio_url": f"/audio/{clip_id}"
         })
         
     except HTTPException:
@@ -351,14 +611,23 @@ async def chat_endpoint(request: Request):
         if not message:
             raise HTTPException(status_code=400, detail="Message is required")
         
-        # Get data context if available
-        data_context = data_processor.get_analysis_context()
+        processor = await data_executor.run(dataset_registry.get, data.get("session_id"))
         
-        # Get LLM response
-        response, _ = llm.get_llm_response(message, [], data_context)
+        # Simple aggregate questions are answered from the DataFrame, skipping the LLM
+        response = await data_executor.run(processor.answer_locally, message)
+        if response is None:
+            # Get data context for this session's dataset if available
+            data_context = processor.get_analysis_context()
+            query_result = await run_planned_query(processor, message, gemini_executor, data_executor)
+            
+            # Get LLM response
+            response, _ = await gemini_executor.run(llm.get_llm_response, message, [], data_context, query_result)
+        
+        if data.get("stream"):
+            return await stream_speech(response, {"success": True, "chat_id": chat_id})
         
         # Generate audio response
-        audio_bytes = tts.speak(response)
+        audio_bytes = await murf_executor.run(tts.speak, response)
         b64_audio = None
         if audio_bytes:
             b64_audio = base64.b64encode(audio_bytes).decode('utf-8')
@@ -391,14 +660,19 @@ async def persona_chat_endpoint(request: Request):
         # Get persona configuration
         persona_config = get_persona(persona_key)
         
-        # Get data context if available
-        data_context = data_processor.get_analysis_context()
+        # Get data context for this session's dataset if available
+        processor = await data_executor.run(dataset_registry.get, data.get("session_id"))
+        data_context = processor.get_analysis_context()
+        query_result = await run_planned_query(processor, message, gemini_executor, data_executor)
         
         # Get persona-based LLM response
-        response, _ = llm.get_persona_response(message, [], data_context, persona_config)
+        response, _ = await gemini_executor.run(llm.get_persona_response, message, [], data_context, persona_config, query_result)
+        
+        if data.get("stream"):
+            return await stream_speech(response, {"success": True, "persona": persona_key})
         
         # Generate audio response
-        audio_bytes = tts.speak(response)
+        audio_bytes = await murf_executor.run(tts.speak, response)
         b64_audio = None
         if audio_bytes:
             b64_audio = base64.b64encode(audio_bytes).decode('utf-8')
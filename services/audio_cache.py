@@ -0,0 +1,188 @@
+# services/audio_cache.py
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from config import TTS_CACHE_MEMORY_BYTES, TTS_CACHE_DISK_BYTES, MULTI_WORKER, STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = STATE_DIR / "tts_cache"
+
+# With several workers sharing the directory: re-scan it after this fraction of
+# the disk limit was written locally, and evict down to this fraction of it
+_SHARED_RESCAN_FRACTION = 0.1
+_SHARED_EVICT_TO_FRACTION = 0.9
+
+
+class TTSAudioCache:
+    """
+    Content-addressed cache for synthesized speech.
+
+    Clips are keyed by a hash of (text, voice_id, style, format). A byte-bounded
+    in-memory LRU tier sits in front of a disk tier whose total size is capped;
+    the least recently used files are evicted first. The disk tier's sizes and
+    recency order are tracked in memory (seeded from the directory at startup),
+    so a single worker never re-lists the directory to evict. When `shared`
+    (several workers using one directory), other workers' writes and evictions
+    are invisible to that index, so it is rebuilt from the directory whenever
+    the local total crosses the limit or a tenth of the limit was written since
+    the last scan, and eviction goes down to 90% of the limit so scans stay
+    infrequent. Safe to use from the worker threads that run TTS.
+    """
+
+    def __init__(self, directory: Path, memory_limit: int, disk_limit: int, shared: bool = MULTI_WORKER):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.shared = shared
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> file size, least recently used first
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._written_since_scan = 0
+        self._lock = threading.Lock()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+        if self.disk_limit > 0:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._scan_disk()
+
+    @staticmethod
+    def make_key(text: str, voice_id: str, style: str, audio_format: str = "WAV") -> str:
+        raw = "\x1f".join([text.strip(), voice_id, style or "", audio_format.upper()])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.audio"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return data
+
+        if self.disk_limit > 0:
+            path = self._path(key)
+            try:
+                data = path.read_bytes()
+                os.utime(path)  # refresh recency for disk eviction
+            except OSError:
+                data = None
+            if data is not None:
+                with self._lock:
+                    self.hits["disk"] += 1
+                    self._remember(key, data)
+                    self._track_disk(key, len(data))
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes):
+        if not data:
+            return
+        with self._lock:
+            self._remember(key, data)
+        if self.disk_limit > 0 and len(data) <= self.disk_limit:
+            self._write_disk(key, data)
+
+    def _remember(self, key: str, data: bytes):
+        """Insert into the memory tier; caller holds the lock."""
+        if len(data) > self.memory_limit:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _write_disk(self, key: str, data: bytes):
+        path = self._path(key)
+        if path.exists():
+            # Written by another worker since our lookup
+            with self._lock:
+                self._track_disk(key, len(data))
+            return
+        tmp_path = path.with_suffix(f".tmp{threading.get_ident()}")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write TTS cache entry: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self._track_disk(key, len(data))
+            self._written_since_scan += len(data)
+            if self.shared and (self._disk_bytes > self.disk_limit
+                                or self._written_since_scan > self.disk_limit * _SHARED_RESCAN_FRACTION):
+                self._scan_disk()
+            if self._disk_bytes > self.disk_limit:
+                self._evict_disk()
+
+    def _scan_disk(self):
+        """Rebuild the disk index from the directory, oldest modification first; caller holds the lock."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".audio"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, entry.name[:-len(".audio")], stat.st_size))
+        self._disk = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._disk_bytes = sum(self._disk.values())
+        self._written_since_scan = 0
+
+    def _track_disk(self, key: str, size: int):
+        """Mark a disk entry as most recently used; caller holds the lock."""
+        previous = self._disk.pop(key, None)
+        if previous is not None:
+            self._disk_bytes -= previous
+        self._disk[key] = size
+        self._disk_bytes += size
+
+    def _evict_disk(self):
+        """Delete least recently used files until under the disk limit; caller holds the lock."""
+        target = self.disk_limit * (_SHARED_EVICT_TO_FRACTION if self.shared else 1)
+        while self._disk_bytes > target and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                self._path(key).unlink(missing_ok=True)
+            except OSError as e:
+                logger.debug(f"Could not evict TTS cache entry: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.hits["memory"] + self.hits["disk"]
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+# Global instance
+tts_cache = TTSAudioCache(CACHE_DIR, TTS_CACHE_MEMORY_BYTES, TTS_CACHE_DISK_BYTES)
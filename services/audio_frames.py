@@ -0,0 +1,59 @@
+# services/audio_frames.py
+import base64
+import struct
+from typing import Tuple
+
+# Binary WebSocket audio frame layout (network byte order):
+#   version (u8) | sequence (u32) | sentence index (u16) | format (u8) | audio bytes
+# Control and text events stay on JSON text messages.
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("!BIHB")
+
+AUDIO_FORMATS = {
+    "wav": 1,
+    "mp3": 2,
+}
+_FORMAT_NAMES = {code: name for name, code in AUDIO_FORMATS.items()}
+
+
+def encode_audio_frame(sequence: int, sentence_index: int, audio_bytes: bytes, audio_format: str = "wav") -> bytes:
+    """Prefix raw audio bytes with the binary frame header."""
+    header = FRAME_HEADER.pack(
+        FRAME_VERSION,
+        sequence & 0xFFFFFFFF,
+        sentence_index & 0xFFFF,
+        AUDIO_FORMATS[audio_format],
+    )
+    return header + audio_bytes
+
+
+def decode_audio_frame(frame: bytes) -> Tuple[int, int, str, memoryview]:
+    """Split a binary frame into (sequence, sentence_index, format, audio)."""
+    version, sequence, sentence_index, format_code = FRAME_HEADER.unpack_from(frame)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported audio frame version: {version}")
+    return sequence, sentence_index, _FORMAT_NAMES.get(format_code, "unknown"), memoryview(frame)[FRAME_HEADER.size:]
+
+
+class AudioSender:
+    """
+    Sends synthesized audio over a WebSocket in the negotiated framing mode.
+
+    In binary mode each clip goes out as a single binary message with a header;
+    otherwise it falls back to the base64-in-JSON {"type": "audio"} message.
+    """
+
+    def __init__(self, websocket, binary: bool = False, audio_format: str = "wav"):
+        self.websocket = websocket
+        self.binary = binary
+        self.audio_format = audio_format
+        self.sequence = 0
+
+    async def send(self, sentence_index: int, audio_bytes: bytes):
+        if self.binary:
+            frame = encode_audio_frame(self.sequence, sentence_index, audio_bytes, self.audio_format)
+            await self.websocket.send_bytes(frame)
+        else:
+            b64_audio = base64.b64encode(audio_bytes).decode('utf-8')
+            await self.websocket.send_json({"type": "audio", "b64": b64_audio})
+        self.sequence += 1
@@ -0,0 +1,41 @@
+# services/audio_sink.py
+from typing import Callable, Iterable, List, Optional
+
+ChunkListener = Callable[[bytes], None]
+
+
+class AudioSink:
+    """
+    Collects streamed audio chunks and forwards each one as it arrives.
+
+    Chunks are appended to a growing bytearray (amortized O(1) per chunk, unlike
+    `bytes += chunk`, which copies everything received so far), so assembling a
+    clip is linear in its size. Listeners are called with every chunk, e.g. to
+    push audio to a client while synthesis is still running.
+    """
+
+    def __init__(self, *listeners: Optional[ChunkListener]):
+        self._buffer = bytearray()
+        self._listeners: List[ChunkListener] = [listener for listener in listeners if listener is not None]
+
+    def add_listener(self, listener: ChunkListener):
+        self._listeners.append(listener)
+
+    def write(self, chunk: bytes):
+        if not chunk:
+            return
+        self._buffer += chunk
+        for listener in self._listeners:
+            listener(chunk)
+
+    def consume(self, chunks: Iterable[bytes]) -> bytes:
+        """Write every chunk from an iterable (e.g. a Murf stream) and return the whole clip."""
+        for chunk in chunks:
+            self.write(chunk)
+        return self.getvalue()
+
+    def getvalue(self) -> bytes:
+        return bytes(self._buffer)
+
+    def __len__(self) -> int:
+        return len(self._buffer)
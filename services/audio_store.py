@@ -0,0 +1,197 @@
+# services/audio_store.py
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from config import AUDIO_STORE_MEMORY_BYTES, AUDIO_STORE_DISK_BYTES, AUDIO_STORE_TTL_SECONDS, MULTI_WORKER, STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = STATE_DIR / "audio"
+
+CLIP_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+_EXTENSIONS = {"audio/wav": "wav", "audio/mpeg": "mp3"}
+_CONTENT_TYPES = {ext: content_type for content_type, ext in _EXTENSIONS.items()}
+
+# Disk expiry and size checks run at most this often
+_SWEEP_INTERVAL_SECONDS = 60
+
+
+class AudioStore:
+    """
+    Generated audio clips addressed by content ID, served at /audio/{id}.
+
+    Clips live in a byte-bounded in-memory LRU tier and are written to disk by a
+    background thread, so a request never waits on disk I/O (in multi-worker
+    mode the write happens before put() returns, so any worker can serve the
+    clip). Clips expire `ttl_seconds` after they were last stored, and the disk
+    tier is capped at `disk_limit` bytes, oldest first.
+
+    get() may read from disk and put() may write to it, so async callers run
+    them in an executor.
+    """
+
+    def __init__(self, directory: Path, memory_limit: int, disk_limit: int, ttl_seconds: float, write_through: bool = False):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self.ttl_seconds = ttl_seconds
+        self.write_through = write_through
+        # clip id -> (audio bytes, content type, stored at)
+        self._memory: "OrderedDict[str, Tuple[bytes, str, float]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-store")
+        self._last_sweep = 0.0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_id(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()[:32]
+
+    def _path(self, clip_id: str, content_type: str) -> Path:
+        return self.directory / f"{clip_id}.{_EXTENSIONS.get(content_type, 'bin')}"
+
+    def put(self, data: bytes, content_type: str = "audio/wav") -> str:
+        """Store a clip and return its ID; storing identical audio again refreshes its TTL."""
+        clip_id = self.make_id(data)
+        now = time.time()
+        with self._lock:
+            previous = self._memory.pop(clip_id, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous[0])
+            if len(data) <= self.memory_limit:
+                self._memory[clip_id] = (data, content_type, now)
+                self._memory_bytes += len(data)
+                while self._memory_bytes > self.memory_limit:
+                    _, (evicted, _, _) = self._memory.popitem(last=False)
+                    self._memory_bytes -= len(evicted)
+
+        if self.write_through:
+            self._write(clip_id, data, content_type)
+        else:
+            self._writer.submit(self._write, clip_id, data, content_type)
+        return clip_id
+
+    def get(self, clip_id: str) -> Optional[Tuple[bytes, str]]:
+        """Return (audio bytes, content type), or None if the clip is unknown or expired."""
+        if not CLIP_ID_PATTERN.match(clip_id):
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(clip_id)
+            if entry is not None:
+                data, content_type, stored_at = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._memory.move_to_end(clip_id)
+                    self.hits["memory"] += 1
+                    return data, content_type
+                del self._memory[clip_id]
+                self._memory_bytes -= len(data)
+
+        for ext, content_type in _CONTENT_TYPES.items():
+            path = self.directory / f"{clip_id}.{ext}"
+            try:
+                if now - path.stat().st_mtime > self.ttl_seconds:
+                    continue
+                data = path.read_bytes()
+            except OSError:
+                continue
+            with self._lock:
+                self.hits["disk"] += 1
+            return data, content_type
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _write(self, clip_id: str, data: bytes, content_type: str):
+        path = self._path(clip_id, content_type)
+        try:
+            if path.exists():
+                os.utime(path)  # restart the TTL
+            else:
+                tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write audio clip {clip_id}: {e}")
+        if time.time() - self._last_sweep >= _SWEEP_INTERVAL_SECONDS:
+            self._sweep()
+
+    def _sweep(self):
+        """Delete expired clips, then the oldest ones while the disk tier is over its limit."""
+        self._last_sweep = time.time()
+        cutoff = self._last_sweep - self.ttl_seconds
+        entries = []
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if stat.st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_limit:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+        with self._lock:
+            for clip_id in [cid for cid, (_, _, stored_at) in self._memory.items() if stored_at < cutoff]:
+                data, _, _ = self._memory.pop(clip_id)
+                self._memory_bytes -= len(data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.hits["memory"] + self.hits["disk"]
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.hits["memory"],
+                "disk_hits": self.hits["disk"],
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "bytes=" Range header into an inclusive (start, end).
+    Returns None for a malformed or unsatisfiable range.
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", header or "")
+    if match is None or size == 0:
+        return None
+    start, end = match.groups()
+    if start == "":
+        if end == "":
+            return None
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+# Global instance
+audio_store = AudioStore(STORE_DIR, AUDIO_STORE_MEMORY_BYTES, AUDIO_STORE_DISK_BYTES, AUDIO_STORE_TTL_SECONDS,
+                         write_through=MULTI_WORKER)
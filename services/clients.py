@@ -0,0 +1,130 @@
+# services/clients.py
+import logging
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+import google.generativeai as genai
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from murf import Murf
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class MurfClientRegistry:
+    """
+    Process-wide registry of Murf SDK clients and HTTP sessions.
+
+    Clients are keyed by API key and share keep-alive connection pools bounded
+    by HTTP_POOL_MAXSIZE, so consecutive sentences reuse an established TLS
+    connection. Clients built for a key that has since been replaced through
+    config.set_api_keys are closed and dropped.
+    """
+
+    def __init__(self, pool_maxsize: int):
+        self.pool_maxsize = max(1, pool_maxsize)
+        self._clients: Dict[str, Murf] = {}
+        self._http_clients: Dict[str, httpx.Client] = {}
+        self._session = None
+        self._lock = threading.Lock()
+
+    def get_murf_client(self, api_key: str) -> Murf:
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                http_client = httpx.Client(
+                    timeout=60,
+                    follow_redirects=True,
+                    limits=httpx.Limits(
+                        max_connections=self.pool_maxsize,
+                        max_keepalive_connections=self.pool_maxsize,
+                    ),
+                )
+                client = Murf(api_key=api_key, httpx_client=http_client)
+                self._clients[api_key] = client
+                self._http_clients[api_key] = http_client
+            return client
+
+    def get_session(self) -> requests.Session:
+        """Shared requests session for the Murf REST endpoints; the key goes in headers."""
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def on_keys_changed(self, changed: Set[str]):
+        if "MURF_API_KEY" not in changed:
+            return
+        current = config.get_api_key("MURF_API_KEY")
+        with self._lock:
+            stale = [key for key in self._clients if key != current]
+            for key in stale:
+                self._clients.pop(key, None)
+                http_client = self._http_clients.pop(key, None)
+                if http_client is not None:
+                    try:
+                        http_client.close()
+                    except Exception as e:
+                        logger.warning(f"Error closing Murf HTTP client: {e}")
+        if stale:
+            logger.info(f"Dropped {len(stale)} Murf client(s) for replaced API keys")
+
+
+# Global instance
+murf_clients = MurfClientRegistry(config.HTTP_POOL_MAXSIZE)
+config.register_key_change_listener(murf_clients.on_keys_changed)
+
+
+def get_murf_client(api_key: str) -> Murf:
+    """Pooled Murf client for the given API key."""
+    return murf_clients.get_murf_client(api_key)
+
+
+class GeminiModelRegistry:
+    """
+    Cache of GenerativeModel instances keyed by (api_key, model name, system_instruction).
+
+    genai.configure() mutates process-global state, so it only runs when a model
+    for a new key is first built; later requests reuse the cached model and its
+    client. Each persona's system prompt gets its own entry. The cache is
+    cleared when config.set_api_keys changes the Gemini key.
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, str, Optional[str]], genai.GenerativeModel] = {}
+        self._lock = threading.Lock()
+
+    def get_model(self, api_key: str, model_name: str = "gemini-1.5-flash", system_instruction: Optional[str] = None) -> genai.GenerativeModel:
+        cache_key = (api_key, model_name, system_instruction)
+        with self._lock:
+            model = self._models.get(cache_key)
+            if model is None:
+                genai.configure(api_key=api_key)
+                if system_instruction is None:
+                    model = genai.GenerativeModel(model_name)
+                else:
+                    model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+                self._models[cache_key] = model
+            return model
+
+    def on_keys_changed(self, changed: Set[str]):
+        if "GEMINI_API_KEY" not in changed:
+            return
+        with self._lock:
+            self._models.clear()
+
+
+# Global instance
+gemini_models = GeminiModelRegistry()
+config.register_key_change_listener(gemini_models.on_keys_changed)
+
+
+def get_gemini_model(api_key: str, system_instruction: Optional[str] = None, model_name: str = "gemini-1.5-flash") -> genai.GenerativeModel:
+    """Cached Gemini model for the given key and system instruction."""
+    return gemini_models.get_model(api_key, model_name, system_instruction)
@@ -0,0 +1,140 @@
+# services/conversation.py
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from config import CHAT_HISTORY_TOKEN_BUDGET, CHAT_HISTORY_RECENT_TURNS, CHAT_SUMMARY_MAX_CHARS
+
+logger = logging.getLogger(__name__)
+
+# (user text, model text)
+Turn = Tuple[str, str]
+
+# Summarizer(previous summary, turns to fold in) -> new summary
+Summarizer = Callable[[str, List[Turn]], Optional[str]]
+
+
+# Summaries are written off the voice pipeline so a reply never waits for one
+_summary_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+class ConversationHistory:
+    """
+    Chat history kept under a token budget.
+
+    Turns are stored as the plain user question and model reply; per-turn
+    prompt additions such as the dataset context are never stored. When the
+    stored turns exceed `token_budget`, the oldest turns (all but the
+    `recent_turns` most recent) are folded into a rolling summary, so the
+    history sent with each request stays roughly constant in size however long
+    the session runs. compact_in_background() does the folding on a worker
+    thread; the folded turns stay in place until their summary is ready and
+    are then swapped for it in one step.
+    """
+
+    def __init__(self, token_budget: int = CHAT_HISTORY_TOKEN_BUDGET, recent_turns: int = CHAT_HISTORY_RECENT_TURNS,
+                 summary_max_chars: int = CHAT_SUMMARY_MAX_CHARS):
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self.summary_max_chars = summary_max_chars
+        self.summary = ""
+        self.turns: List[Turn] = []
+        self._lock = threading.Lock()
+        self._compaction: Optional[Future] = None
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def add_turn(self, user_text: str, model_text: str):
+        with self._lock:
+            self.turns.append((user_text, model_text))
+
+    def token_count(self) -> int:
+        with self._lock:
+            return self._token_count()
+
+    def _token_count(self) -> int:
+        return estimate_tokens(self.summary) + sum(estimate_tokens(u) + estimate_tokens(m) for u, m in self.turns)
+
+    def over_budget(self) -> bool:
+        return self.token_count() > self.token_budget
+
+    def compact(self, summarizer: Optional[Summarizer] = None):
+        """
+        Fold the oldest turns into the summary until the history fits the budget.
+
+        The summarizer is called once per compaction with everything being
+        folded in; when it is missing or fails, the turns are condensed by
+        clipping instead.
+        """
+        with self._lock:
+            if self._token_count() <= self.token_budget:
+                return
+            # Keep at most recent_turns verbatim (always the latest one), within half the
+            # budget, so compaction runs every few turns rather than on every turn
+            target = self.token_budget // 2
+            last = len(self.turns) - 1
+            keep = len(self.turns)
+            recent_tokens = estimate_tokens(self.summary)
+            for index in range(last, -1, -1):
+                if last - index >= self.recent_turns:
+                    break
+                user_text, model_text = self.turns[index]
+                recent_tokens += estimate_tokens(user_text) + estimate_tokens(model_text)
+                if recent_tokens > target and index != last:
+                    break
+                keep = index
+            if keep == 0:
+                return
+            # Turns added while summarizing come after these and are kept
+            folded = self.turns[:keep]
+            previous = self.summary
+
+        summary = None
+        if summarizer is not None:
+            try:
+                summary = summarizer(previous, folded)
+            except Exception as e:
+                logger.warning(f"Conversation summary failed, clipping instead: {e}")
+        if not summary:
+            summary = self._clip(previous, folded)
+
+        summary = summary.strip()
+        if len(summary) > self.summary_max_chars:
+            # Drop the oldest material, starting at a line boundary where there is one
+            summary = summary[-self.summary_max_chars:]
+            summary = summary.split("\n", 1)[-1]
+        with self._lock:
+            self.turns = self.turns[keep:]
+            self.summary = summary
+
+    def compact_in_background(self, summarizer: Optional[Summarizer] = None):
+        """Start compact() on a worker thread unless one is already running for this history."""
+        with self._lock:
+            if self._compaction is not None and not self._compaction.done():
+                return
+            self._compaction = _summary_pool.submit(self.compact, summarizer)
+
+    def _clip(self, previous: str, turns: List[Turn]) -> str:
+        lines = [previous] if previous else []
+        for user_text, model_text in turns:
+            lines.append(f"User: {user_text[:200]} / Assistant: {model_text[:200]}")
+        return "\n".join(lines)
+
+    def as_gemini_history(self) -> List[Dict[str, Any]]:
+        """History in the role/parts form accepted by start_chat, summary first."""
+        with self._lock:
+            history = []
+            if self.summary:
+                history.append({"role": "user", "parts": [f"Summary of our conversation so far:\n{self.summary}"]})
+                history.append({"role": "model", "parts": ["Got it, I'll keep that in mind."]})
+            for user_text, model_text in self.turns:
+                history.append({"role": "user", "parts": [user_text]})
+                history.append({"role": "model", "parts": [model_text]})
+            return history
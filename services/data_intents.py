@@ -0,0 +1,259 @@
+# services/data_intents.py
+import logging
+import re
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Questions that need reasoning or explanation always go to the LLM
+_OPEN_ENDED = re.compile(
+    r"\b(why|explain|compare|comparison|trend|trends|correlat\w*|predict\w*|forecast|should|"
+    r"recommend\w*|insight\w*|analy[sz]e|versus|vs|relationship|impact|cause\w*|pattern\w*)\b"
+)
+
+# (pattern, pandas method, spoken label, words the intent consumes)
+_AGGREGATES = [
+    (re.compile(r"\b(average|mean|avg)\b"), "mean", "average", {"average", "mean", "avg"}),
+    (re.compile(r"\b(max|maximum|highest|largest|biggest|top value)\b"), "max", "maximum",
+     {"max", "maximum", "highest", "largest", "biggest", "top", "value"}),
+    (re.compile(r"\b(min|minimum|lowest|smallest)\b"), "min", "minimum", {"min", "minimum", "lowest", "smallest"}),
+    (re.compile(r"\b(sum|total)\b"), "sum", "total", {"sum", "total"}),
+    (re.compile(r"\bmedian\b"), "median", "median", {"median"}),
+]
+
+_ROW_COUNT = re.compile(r"\bhow many (rows|records|entries|lines|items|data points)\b|\b(row|record) count\b|\bnumber of (rows|records|entries)\b")
+_COLUMN_COUNT = re.compile(r"\bhow many (columns|fields|variables)\b|\bnumber of (columns|fields)\b")
+_COLUMN_LIST = re.compile(r"\b(what|which|list|name|show)\b.*\b(columns|fields)\b")
+_TOP_CATEGORY = re.compile(r"\b(most (common|frequent|popular)|top|mode)\b")
+_MISSING = re.compile(r"\b(missing|null|nulls|empty|blank|nan)\b")
+_FILTER_COUNT = re.compile(r"\bhow many\b")
+
+# Words each intent consumes; any other word left in the question (a month, a
+# region, "in", "for", ...) is an unhandled qualifier and defers to the LLM
+_ROW_COUNT_WORDS = {"how", "many", "rows", "row", "records", "record", "entries", "lines", "items", "data", "points",
+                    "count", "number"}
+_COLUMN_COUNT_WORDS = {"how", "many", "columns", "fields", "variables", "count", "number"}
+_COLUMN_LIST_WORDS = {"columns", "fields", "list", "show", "name", "names", "called"}
+_MISSING_WORDS = {"how", "many", "missing", "null", "nulls", "empty", "blank", "nan", "count", "number", "any"}
+_TOP_CATEGORY_WORDS = {"most", "common", "frequent", "popular", "top", "mode"}
+_FILTER_WORDS = {"how", "many", "rows", "row", "records", "entries", "items", "with", "where", "whose"}
+_FILLER = {
+    "what", "what's", "whats", "which", "is", "are", "was", "were", "the", "a", "an", "of", "do", "does", "did",
+    "i", "we", "you", "it", "this", "my", "our", "can", "could", "would", "please", "tell", "me", "us", "give",
+    "there", "have", "has", "got", "contain", "contains", "dataset", "data", "file", "table", "value", "values",
+    "column", "columns", "field", "fields", "all", "overall", "currently", "loaded", "uploaded", "exactly",
+}
+_DATASET_PHRASE = re.compile(r"\b(?:in|of|from|for)\s+(?:the\s+|this\s+|my\s+|our\s+)?(?:dataset|data|file|table|sheet|spreadsheet)\b")
+_TOKEN = re.compile(r"[^\W_]+(?:'[^\W_]+)?")
+
+# (phrases, operator, spoken form); inclusive forms first so "at least" is not read as "least"
+_COMPARATORS = [
+    (r">=|at least|greater than or equal to|more than or equal to|no less than", "ge", "at least"),
+    (r"<=|at most|less than or equal to|no more than", "le", "at most"),
+    (r">|greater than|more than|above|over|exceeds?|higher than", "gt", "above"),
+    (r"<|less than|fewer than|below|under|lower than", "lt", "below"),
+    (r"!=|is not|isn't|not equal to|other than", "ne", "not equal to"),
+    (r"==|=|equal to|equals?", "eq", "equal to"),
+]
+_NUMBER = r"-?\d[\d,]*(?:\.\d+)?"
+
+
+def _normalize(text: str) -> str:
+    # "Sales_Amount" and "sales amount" should match; a leading minus sign must survive
+    return re.sub(r"(?<=\w)[_\-]+(?=\w)|_+", " ", text.lower()).strip()
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        if value.is_integer():
+            return f"{int(value):,}"
+        return f"{value:,.2f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+
+class DataIntentRouter:
+    """
+    Answers simple aggregate questions about a loaded dataset without an LLM call.
+
+    Recognizes row/column counts, column listings, mean/max/min/sum/median of a
+    column, the most common value of a text column, missing-value counts and
+    single-condition filtered counts. Every word of the question must be
+    accounted for by the intent; a question with any other qualifier ("in
+    January", "for north"), more than one column for an aggregate, or a
+    condition that does not parse returns None so the caller falls back to the
+    LLM.
+    """
+
+    def answer(self, df: "pd.DataFrame", question: str, total_rows: Optional[int] = None,
+               numeric_summary: Optional[Dict[str, Dict[str, float]]] = None) -> Optional[str]:
+        """
+        Return a spoken-style answer, or None when the question is not a simple aggregate.
+
+        When df is only a sample of a larger file, total_rows and numeric_summary
+        describe the full file; intents that would need every row (filters, top
+        values, missing counts) are then left to the LLM.
+        """
+        if df is None or not question:
+            return None
+        text = _normalize(question)
+        if _OPEN_ENDED.search(text):
+            return None
+
+        try:
+            return self._route(df, text, total_rows, numeric_summary)
+        except Exception as e:
+            logger.warning(f"Local data answer failed, deferring to LLM: {e}")
+            return None
+
+    def _route(self, df, text, total_rows, numeric_summary) -> Optional[str]:
+        sampled = total_rows is not None
+        columns = self._mentioned_columns(df, text)
+
+        if _COLUMN_COUNT.search(text):
+            if self._leftover(text, columns, _COLUMN_COUNT_WORDS):
+                return None
+            return f"The dataset has {df.shape[1]} columns."
+
+        # Before the column listing, so "which columns have missing values" is a missing-values question
+        if _MISSING.search(text):
+            if sampled or len(columns) > 1 or self._leftover(text, columns, _MISSING_WORDS):
+                return None
+            return self._missing(df, columns[0] if columns else None)
+
+        if _COLUMN_LIST.search(text):
+            if columns or self._leftover(text, columns, _COLUMN_LIST_WORDS):
+                return None
+            return f"The columns are: {', '.join(map(str, df.columns))}."
+
+        if _FILTER_COUNT.search(text) and columns:
+            # "how many ... <column> ..." is a filtered count or nothing; never the total row count
+            if len(columns) != 1 or sampled:
+                return None
+            condition = self._parse_condition(df, columns[0], text)
+            if condition is None:
+                return None
+            op, value, spoken, raw, span = condition
+            if self._leftover(text.replace(span, " "), [], _FILTER_WORDS):
+                return None
+            return self._filtered_count(df, columns[0], op, value, spoken, raw)
+
+        if _ROW_COUNT.search(text):
+            if self._leftover(text, columns, _ROW_COUNT_WORDS):
+                return None
+            rows = total_rows if sampled else len(df)
+            return f"The dataset has {_format_value(int(rows))} rows."
+
+        for pattern, func, label, words in _AGGREGATES:
+            if pattern.search(text):
+                if len(columns) != 1 or self._leftover(text, columns, words):
+                    return None
+                return self._aggregate(df, columns[0], func, label, sampled, numeric_summary)
+
+        if _TOP_CATEGORY.search(text) and len(columns) == 1 and not sampled:
+            if self._leftover(text, columns, _TOP_CATEGORY_WORDS):
+                return None
+            return self._top_category(df, columns[0])
+
+        return None
+
+    def _leftover(self, text: str, columns: List[str], words) -> List[str]:
+        """Words of the question not accounted for by the intent, its columns or filler."""
+        text = _DATASET_PHRASE.sub(" ", text)
+        for col in columns:
+            name = re.escape(_normalize(str(col)))
+            text = re.sub(rf"\b(?:(?:in|for|of|from)\s+(?:the\s+)?)?{name}s?(?:\s+(?:column|field))?\b", " ", text)
+        return [word for word in _TOKEN.findall(text) if word not in _FILLER and word not in words]
+
+    def _mentioned_columns(self, df, text: str) -> List[str]:
+        """Columns named in the question; longer names win over names they contain."""
+        found = []
+        for col in sorted(df.columns, key=lambda c: len(str(c)), reverse=True):
+            name = _normalize(str(col))
+            if not name:
+                continue
+            if re.search(rf"\b{re.escape(name)}s?\b", text):
+                if not any(name in _normalize(str(other)) for other in found):
+                    found.append(col)
+        return found
+
+    def _aggregate(self, df, col, func, label, sampled, numeric_summary) -> Optional[str]:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            return None
+        if sampled:
+            # Only exact full-file statistics are answered for sampled datasets
+            stats = (numeric_summary or {}).get(col, {})
+            key = {"mean": "mean", "max": "max", "min": "min"}.get(func)
+            if key is None or key not in stats:
+                return None
+            value = stats[key]
+        else:
+            value = getattr(df[col], func)()
+        if pd.isna(value):
+            return f"{col} has no values to compute the {label} from."
+        return f"The {label} of {col} is {_format_value(float(value))}."
+
+    def _top_category(self, df, col) -> Optional[str]:
+        series = df[col]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            return None
+        counts = series.value_counts()
+        if counts.empty:
+            return f"{col} has no values."
+        return f"The most common {col} is {counts.index[0]}, with {_format_value(int(counts.iloc[0]))} rows."
+
+    def _missing(self, df, col) -> str:
+        if col is not None:
+            count = int(df[col].isna().sum())
+            return f"{col} has {_format_value(count)} missing values."
+        missing = df.isna().sum()
+        missing = missing[missing > 0]
+        if missing.empty:
+            return "There are no missing values in the dataset."
+        parts = [f"{name} has {_format_value(int(count))}" for name, count in missing.items()]
+        return f"Missing values: {'; '.join(parts)}."
+
+    def _parse_condition(self, df, col, text: str):
+        """
+        (operator, value, spoken form, raw value, matched text) for
+        "<column> [is|are] <comparator> <value>" ending the question, if present.
+        Text values must be an existing value of the column.
+        """
+        name = re.escape(_normalize(str(col)))
+        numeric = pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+        for phrases, op, spoken in _COMPARATORS:
+            match = re.search(rf"\b{name}s?\s+(?:(?:is|are|was|were)\s+)?(?:{phrases})\s+(.+?)\s*[?.!]*$", text)
+            if match is None:
+                continue
+            raw = match.group(1).strip().strip("'\"")
+            if numeric:
+                if re.fullmatch(_NUMBER, raw) is None:
+                    return None
+                return op, float(raw.replace(",", "")), spoken, raw, match.group(0)
+            if op not in ("eq", "ne") or not self._normalized_values(df[col]).eq(raw).any():
+                return None
+            return op, raw, spoken, raw, match.group(0)
+        return None
+
+    @staticmethod
+    def _normalized_values(series):
+        return series.astype("string").str.strip().map(_normalize, na_action="ignore")
+
+    def _filtered_count(self, df, col, op, value, spoken, raw) -> str:
+        values = df[col]
+        if isinstance(value, str):
+            values = self._normalized_values(values)
+        mask = {
+            "eq": values == value, "ne": values != value,
+            "gt": values > value, "lt": values < value,
+            "ge": values >= value, "le": values <= value,
+        }[op]
+        count = int(mask.fillna(False).sum())
+        return f"{_format_value(count)} rows have {col} {spoken} {raw}."
+
+
+# Global instance
+data_intent_router = DataIntentRouter()
@@ -1,12 +1,21 @@
 # services/data_processor.py
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 import io
+import os
 import logging
 from pathlib import Path
+import json
+import tempfile
+from config import PDF_WORKERS, PDF_MAX_PAGES, PDF_MAX_TEXT_CHARS, PDF_MAX_TABLES
+from config import CSV_STREAMING_THRESHOLD_BYTES, CSV_CHUNK_ROWS, CSV_SAMPLE_MEMORY_BYTES, DATA_PARSER_ENGINE
 
 # Try to import optional dependencies
 try:
+    import numpy as np
     import pandas as pd
+    from services.streaming_stats import StreamingCSVProfiler, TEXT_DTYPES
+    from services.data_intents import data_intent_router
+    from services.structured_query import validate_query, execute_query, describe_columns, QueryError
     PANDAS_AVAILABLE = True
 except ImportError:
     PANDAS_AVAILABLE = False
@@ -14,11 +23,24 @@ except ImportError:
 
 try:
     import pdfplumber
+    from services import pdf_pages
     PDF_AVAILABLE = True
 except ImportError:
     PDF_AVAILABLE = False
     print("Warning: pdfplumber not installed. PDF processing will be disabled.")
 
+try:
+    import pyarrow
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+try:
+    import python_calamine
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 class DataProcessor:
@@ -27,9 +49,53 @@ class DataProcessor:
     def __init__(self):
         self.current_data = None
         self.file_info = {}
+        # Bumped whenever current_data changes; the cached context is tagged with it
+        self.dataset_version = 0
+        self._context_cache = None
+        # Full-file statistics when current_data is only a sample
+        self._sampled_summary = None
+        self._schema_cache = None
+    
+    def set_current_data(self, df: Optional["pd.DataFrame"], numeric_summary: Optional[Dict[str, Dict[str, float]]] = None, total_rows: Optional[int] = None):
+        """
+        Replace the loaded dataset and precompute its LLM context once.
+
+        When df is only a sample of a larger file, total_rows is the row count of
+        the full file and numeric_summary should describe the full file.
+        """
+        self.current_data = df
+        if total_rows is None:
+            self.file_info.pop('total_rows', None)
+        else:
+            self.file_info['total_rows'] = total_rows
+        self.dataset_version += 1
+        self._context_cache = None
+        self._sampled_summary = numeric_summary if total_rows is not None else None
+        if df is not None:
+            self._context_cache = (self.dataset_version, self._build_analysis_context(df, numeric_summary))
     
-    def process_file(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """Process uploaded file and return analysis results."""
+    def restore_result(self, df: Optional["pd.DataFrame"], result: Dict[str, Any], filename: str) -> Dict[str, Any]:
+        """
+        Load a previously processed upload without re-parsing or re-profiling it.
+
+        result is the stored response of the original process_file call; its
+        numeric profile seeds the LLM context.
+        """
+        self.file_info['filename'] = filename
+        if df is not None:
+            analysis = result.get("analysis", {})
+            total_rows = result["shape"][0] if "sampled_rows" in analysis else None
+            self.set_current_data(df, analysis.get("numeric_summary"), total_rows=total_rows)
+        return dict(result, filename=filename)
+    
+    def process_file(self, file_content: Union[bytes, str, Path], filename: str) -> Dict[str, Any]:
+        """
+        Process uploaded file and return analysis results.
+
+        file_content may be the raw bytes or a path to the file on disk; paths
+        are handed to the parsers directly so large files are not copied onto
+        the Python heap.
+        """
         try:
             file_extension = Path(filename).suffix.lower()
             
@@ -59,24 +125,70 @@ class DataProcessor:
                 "filename": filename
             }
     
-    def _process_csv(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+    def _as_source(self, file_content: Union[bytes, str, Path]):
+        """Path-like content is passed through as a path; bytes are wrapped in a buffer."""
+        if isinstance(file_content, (str, Path)):
+            return str(file_content)
+        return io.BytesIO(file_content)
+    
+    def _source_size(self, file_content: Union[bytes, str, Path]) -> int:
+        if isinstance(file_content, (str, Path)):
+            return os.path.getsize(file_content)
+        return len(file_content)
+    
+    def _use_arrow(self) -> bool:
+        """Whether to parse with the multithreaded pyarrow engine and Arrow-backed dtypes."""
+        if DATA_PARSER_ENGINE == "pandas":
+            return False
+        if DATA_PARSER_ENGINE == "pyarrow" and not ARROW_AVAILABLE:
+            logger.warning("DATA_PARSER_ENGINE=pyarrow but pyarrow is not installed; using pandas parser")
+        return ARROW_AVAILABLE
+    
+    def _read_csv(self, source) -> pd.DataFrame:
+        """Read a whole CSV with the configured parser backend."""
+        if self._use_arrow():
+            try:
+                return pd.read_csv(source, engine="pyarrow", dtype_backend="pyarrow")
+            except Exception as e:
+                # The pyarrow reader is stricter than the C parser about malformed rows
+                logger.warning(f"pyarrow CSV parse failed, retrying with pandas parser: {e}")
+                if hasattr(source, "seek"):
+                    source.seek(0)
+        # Memory-map files on disk instead of reading them through Python buffers
+        return pd.read_csv(source, memory_map=isinstance(source, str))
+    
+    def _read_excel(self, source) -> pd.DataFrame:
+        """Read an Excel sheet, using calamine and Arrow-backed dtypes when available."""
+        if self._use_arrow():
+            engine = "calamine" if CALAMINE_AVAILABLE else None
+            return pd.read_excel(source, engine=engine, dtype_backend="pyarrow")
+        return pd.read_excel(source)
+    
+    def _preview_records(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """First rows as JSON-safe records (dates as ISO strings, missing values as None)."""
+        return json.loads(df.head(5).to_json(orient='records', date_format='iso'))
+    
+    def _process_csv(self, file_content: Union[bytes, str, Path], filename: str, streaming: Optional[bool] = None) -> Dict[str, Any]:
         """Process CSV file and extract insights."""
         if not PANDAS_AVAILABLE:
             raise Exception("pandas is required for CSV processing")
+        if streaming is None:
+            streaming = self._source_size(file_content) > CSV_STREAMING_THRESHOLD_BYTES
+        if streaming:
+            return self._process_csv_streaming(file_content, filename)
         try:
             # Read CSV
-            df = pd.read_csv(io.BytesIO(file_content))
-            self.current_data = df
-            
+            df = self._read_csv(self._as_source(file_content))
             # Basic analysis
             analysis = self._analyze_dataframe(df, filename)
+            self.set_current_data(df, analysis["numeric_summary"])
             
             return {
                 "success": True,
                 "file_type": "CSV",
                 "filename": filename,
                 "analysis": analysis,
-                "preview": df.head(5).to_dict('records'),
+                "preview": self._preview_records(df),
                 "columns": list(df.columns),
                 "shape": df.shape
             }
@@ -84,24 +196,53 @@ class DataProcessor:
         except Exception as e:
             raise Exception(f"Failed to process CSV: {str(e)}")
     
-    def _process_excel(self, file_content: bytes, filename: str) -> Dict[str, Any]:
+    def _process_csv_streaming(self, file_content: Union[bytes, str, Path], filename: str) -> Dict[str, Any]:
+        """
+        Process a large CSV in chunks of CSV_CHUNK_ROWS rows.
+
+        Statistics are computed online over the whole file; only a row sample
+        bounded by CSV_SAMPLE_MEMORY_BYTES is kept as current_data for previews,
+        queries and the LLM context.
+        """
+        try:
+            profiler = StreamingCSVProfiler(CSV_SAMPLE_MEMORY_BYTES)
+            for chunk in pd.read_csv(self._as_source(file_content), chunksize=CSV_CHUNK_ROWS):
+                profiler.update(chunk)
+            
+            analysis = profiler.analysis()
+            sample = profiler.get_sample()
+            self.set_current_data(sample, analysis["numeric_summary"], total_rows=profiler.rows)
+            
+            return {
+                "success": True,
+                "file_type": "CSV",
+                "filename": filename,
+                "analysis": analysis,
+                "preview": self._preview_records(profiler.preview),
+                "columns": profiler.columns,
+                "shape": (profiler.rows, len(profiler.columns))
+            }
+            
+        except Exception as e:
+            raise Exception(f"Failed to process CSV: {str(e)}")
+    
+    def _process_excel(self, file_content: Union[bytes, str, Path], filename: str) -> Dict[str, Any]:
         """Process Excel file and extract insights."""
         if not PANDAS_AVAILABLE:
             raise Exception("pandas and openpyxl are required for Excel processing")
         try:
             # Read Excel
-            df = pd.read_excel(io.BytesIO(file_content))
-            self.current_data = df
-            
+            df = self._read_excel(self._as_source(file_content))
             # Basic analysis
             analysis = self._analyze_dataframe(df, filename)
+            self.set_current_data(df, analysis["numeric_summary"])
             
             return {
                 "success": True,
                 "file_type": "Excel",
                 "filename": filename,
                 "analysis": analysis,
-                "preview": df.head(5).to_dict('records'),
+                "preview": self._preview_records(df),
                 "columns": list(df.columns),
                 "shape": df.shape
             }
@@ -109,43 +250,82 @@ class DataProcessor:
         except Exception as e:
             raise Exception(f"Failed to process Excel: {str(e)}")
     
-    def _process_pdf(self, file_content: bytes, filename: str) -> Dict[str, Any]:
-        """Process PDF file and extract text/tables."""
+    def _process_pdf(self, file_content: Union[bytes, str, Path], filename: str) -> Dict[str, Any]:
+        """
+        Process PDF file and extract text/tables.
+
+        Pages are consumed as a stream and released after extraction. Only the
+        first PDF_MAX_PAGES pages are read, text stops accumulating after
+        PDF_MAX_TEXT_CHARS characters, and at most PDF_MAX_TABLES raw tables are
+        kept; only the tables returned in the response are turned into records.
+        Reading stops once the text budget is full, unless the document has
+        tables and the table budget still has room.
+        """
         if not PDF_AVAILABLE:
             raise Exception("pdfplumber is required for PDF processing")
         try:
             text_content = []
+            text_length = 0
             tables = []
+            tables_found = 0
+            truncated = False
+            
+            # Page workers reopen the document by path, so bytes go to a temp file first
+            temp_path = None
+            if isinstance(file_content, (str, Path)):
+                pdf_path = str(file_content)
+            else:
+                with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+                    f.write(file_content)
+                temp_path = pdf_path = f.name
             
-            with pdfplumber.open(io.BytesIO(file_content)) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    # Extract text
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_content.append(f"Page {page_num}:\n{page_text}")
-                    
-                    # Extract tables
-                    page_tables = page.extract_tables()
-                    if page_tables:
-                        for table_num, table in enumerate(page_tables, 1):
+            try:
+                total_pages = pdf_pages.count_pages(pdf_path)
+                pages_to_read = min(total_pages, PDF_MAX_PAGES)
+                truncated = pages_to_read < total_pages
+                
+                page_results = pdf_pages.iter_pages(pdf_path, pages_to_read, PDF_WORKERS)
+                try:
+                    for page_num, page_text, page_tables in page_results:
+                        # Extract text
+                        if page_text:
+                            entry = f"Page {page_num}:\n{page_text}"
+                            remaining = PDF_MAX_TEXT_CHARS - text_length
+                            if len(entry) > remaining:
+                                entry = entry[:max(remaining, 0)]
+                                truncated = True
+                            if entry:
+                                text_content.append(entry)
+                                text_length += len(entry) + 2
+                        
+                        # Extract tables; rows stay raw until they are returned
+                        for table_num, table in enumerate(page_tables or [], 1):
                             if table:
-                                # Convert table to DataFrame for analysis
-                                df = pd.DataFrame(table[1:], columns=table[0])
-                                tables.append({
-                                    "page": page_num,
-                                    "table": table_num,
-                                    "data": df.to_dict('records'),
-                                    "columns": list(df.columns)
-                                })
+                                tables_found += 1
+                                if len(tables) < PDF_MAX_TABLES:
+                                    tables.append({"page": page_num, "table": table_num, "rows": table})
+                                else:
+                                    truncated = True
+                        
+                        collecting_tables = 0 < len(tables) < PDF_MAX_TABLES
+                        if text_length >= PDF_MAX_TEXT_CHARS and not collecting_tables:
+                            truncated = truncated or page_num < pages_to_read
+                            break
+                finally:
+                    page_results.close()
+            finally:
+                if temp_path:
+                    os.unlink(temp_path)
             
             # Combine all text
             full_text = "\n\n".join(text_content)
             
             # Basic analysis
             analysis = {
-                "total_pages": len(pdf.pages),
+                "total_pages": total_pages,
                 "total_text_length": len(full_text),
-                "tables_found": len(tables),
+                "tables_found": tables_found,
+                "truncated": truncated,
                 "key_insights": self._extract_pdf_insights(full_text, tables)
             }
             
@@ -155,47 +335,57 @@ class DataProcessor:
                 "filename": filename,
                 "analysis": analysis,
                 "text_content": full_text[:2000] + "..." if len(full_text) > 2000 else full_text,
-                "tables": tables[:3],  # Limit to first 3 tables
+                "tables": [self._materialize_table(table) for table in tables[:3]],  # Limit to first 3 tables
                 "full_text": full_text
             }
             
         except Exception as e:
             raise Exception(f"Failed to process PDF: {str(e)}")
     
+    def _materialize_table(self, table: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a raw extracted table (header row + rows) into records."""
+        rows = table["rows"]
+        df = pd.DataFrame(rows[1:], columns=rows[0])
+        return {
+            "page": table["page"],
+            "table": table["table"],
+            "data": df.to_dict('records'),
+            "columns": list(df.columns)
+        }
+    
     def _analyze_dataframe(self, df: pd.DataFrame, filename: str) -> Dict[str, Any]:
         """Perform comprehensive analysis on DataFrame."""
+        numeric_cols = df.select_dtypes(include=['number']).columns
+        numeric_summary = self._profile_numeric(df, numeric_cols)
+        
+        # Numeric null counts come from the profile; only scan the remaining columns
+        other_cols = df.columns.difference(numeric_cols, sort=False)
+        missing_values = df[other_cols].isnull().sum().to_dict() if len(other_cols) else {}
+        for col, stats in numeric_summary.items():
+            missing_values[col] = len(df) - int(stats["count"])
+        
         analysis = {
             "basic_info": {
                 "rows": len(df),
                 "columns": len(df.columns),
-                "memory_usage": df.memory_usage(deep=True).sum(),
-                "missing_values": df.isnull().sum().to_dict()
+                "memory_usage": int(df.memory_usage(deep=True).sum()),
+                "missing_values": {col: missing_values[col] for col in df.columns}
             },
             "column_types": df.dtypes.astype(str).to_dict(),
-            "numeric_summary": {},
+            "numeric_summary": numeric_summary,
             "categorical_summary": {},
             "key_insights": []
         }
         
-        # Numeric columns analysis
-        numeric_cols = df.select_dtypes(include=['number']).columns
-        if len(numeric_cols) > 0:
-            analysis["numeric_summary"] = df[numeric_cols].describe().to_dict()
-            
-            # Find trends and patterns
-            for col in numeric_cols:
-                if df[col].notna().sum() > 0:
-                    mean_val = df[col].mean()
-                    std_val = df[col].std()
-                    min_val = df[col].min()
-                    max_val = df[col].max()
-                    
-                    analysis["key_insights"].append(
-                        f"{col}: Average {mean_val:.2f}, Range {min_val:.2f} to {max_val:.2f}"
-                    )
+        # Find trends and patterns from the same profile
+        for col, stats in numeric_summary.items():
+            if stats["count"] > 0:
+                analysis["key_insights"].append(
+                    f"{col}: Average {stats['mean']:.2f}, Range {stats['min']:.2f} to {stats['max']:.2f}"
+                )
         
         # Categorical columns analysis
-        categorical_cols = df.select_dtypes(include=['object']).columns
+        categorical_cols = df.select_dtypes(include=TEXT_DTYPES).columns
         if len(categorical_cols) > 0:
             for col in categorical_cols[:5]:  # Limit to first 5 categorical columns
                 value_counts = df[col].value_counts().head(5).to_dict()
@@ -210,6 +400,51 @@ class DataProcessor:
         
         return analysis
     
+    def _profile_numeric(self, df: pd.DataFrame, numeric_cols) -> Dict[str, Dict[str, float]]:
+        """
+        Compute describe()-style statistics for the numeric columns.
+
+        Columns are profiled one at a time from a float64 copy of their
+        non-missing values, never the whole numeric block: count, mean, std,
+        min and max are plain reductions over that copy. The quartiles are
+        selected in place one order statistic at a time, each partition only
+        covering the values above the previous one; NumPy's multi-kth
+        partition and nanpercentile are several times slower on tall columns.
+        Returns {column: {count, mean, std, min, 25%, 50%, 75%, max}}.
+        """
+        return {col: self._profile_column(df[col]) for col in numeric_cols}
+    
+    @staticmethod
+    def _profile_column(series: pd.Series) -> Dict[str, float]:
+        values = series.to_numpy(dtype="float64", na_value=np.nan)
+        # Boolean indexing copies, so the partition below never touches the DataFrame
+        valid = values[~np.isnan(values)]
+        count = len(valid)
+        if count == 0:
+            # All-NaN columns yield NaN statistics, as describe() does
+            nan = float("nan")
+            return {"count": 0.0, "mean": nan, "std": nan, "min": nan, "25%": nan, "50%": nan, "75%": nan, "max": nan}
+        
+        stats = {
+            "count": float(count),
+            "mean": float(valid.mean()),
+            "std": float(valid.std(ddof=1)) if count > 1 else float("nan"),
+            "min": float(valid.min()),
+        }
+        maximum = float(valid.max())
+        # Linear interpolation between order statistics, as describe() does
+        positions = np.array([0.25, 0.5, 0.75]) * (count - 1)
+        lower = np.floor(positions).astype(np.intp)
+        upper = np.minimum(lower + 1, count - 1)
+        start = 0
+        for kth in np.unique(np.concatenate([lower, upper])):
+            valid[start:].partition(kth - start)
+            start = kth + 1
+        quartiles = valid[lower] + (valid[upper] - valid[lower]) * (positions - lower)
+        stats.update({"25%": float(quartiles[0]), "50%": float(quartiles[1]), "75%": float(quartiles[2])})
+        stats["max"] = maximum
+        return stats
+    
     def _extract_pdf_insights(self, text: str, tables: List[Dict]) -> List[str]:
         """Extract key insights from PDF content."""
         insights = []
@@ -230,8 +465,9 @@ class DataProcessor:
             insights.append(f"Found {len(tables)} data tables for analysis")
             
             for table in tables[:2]:  # Analyze first 2 tables
-                if table['data']:
-                    insights.append(f"Table on page {table['page']} has {len(table['data'])} rows")
+                row_count = len(table['rows']) - 1
+                if row_count > 0:
+                    insights.append(f"Table on page {table['page']} has {row_count} rows")
         
         return insights
     
@@ -243,17 +479,30 @@ class DataProcessor:
         # Create a comprehensive summary of the current data
         if not PANDAS_AVAILABLE:
             return "Data analysis capabilities limited - pandas not available."
-            
-        df = self.current_data
         
+        # Served from cache until the dataset changes
+        if self._context_cache is None or self._context_cache[0] != self.dataset_version:
+            self._context_cache = (self.dataset_version, self._build_analysis_context(self.current_data))
+        return self._context_cache[1]
+    
+    def _build_analysis_context(self, df: "pd.DataFrame", numeric_summary: Optional[Dict[str, Dict[str, float]]] = None) -> str:
+        """Build the LLM context string for a dataset; O(rows), so done once per load."""
         # Get basic statistics
         numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+        categorical_cols = df.select_dtypes(include=TEXT_DTYPES).columns.tolist()
+        if numeric_summary is None:
+            numeric_summary = self._profile_numeric(df, numeric_cols)
+        
+        total_rows = self.file_info.get('total_rows')
+        if total_rows is not None:
+            shape_text = f"{total_rows} rows, {df.shape[1]} columns (rows below are from a {df.shape[0]}-row sample; statistics cover all rows)"
+        else:
+            shape_text = f"{df.shape[0]} rows, {df.shape[1]} columns"
         
         context = f"""
 CURRENT DATASET CONTEXT:
 File loaded: {self.file_info.get('filename', 'Unknown')}
-Shape: {df.shape[0]} rows, {df.shape[1]} columns
+Shape: {shape_text}
 Columns: {', '.join(df.columns.tolist())}
 
 NUMERIC COLUMNS: {', '.join(numeric_cols) if numeric_cols else 'None'}
@@ -263,7 +512,7 @@ SAMPLE DATA (first 5 rows):
 {df.head(5).to_string()}
 
 SUMMARY STATISTICS:
-{df.describe().to_string() if len(numeric_cols) > 0 else 'No numeric data for statistics'}
+{pd.DataFrame(numeric_summary).to_string() if len(numeric_cols) > 0 else 'No numeric data for statistics'}
 
 KEY INSIGHTS AVAILABLE:
 - You can analyze trends, patterns, and comparisons
@@ -273,6 +522,58 @@ KEY INSIGHTS AVAILABLE:
         
         return context
     
+    def answer_locally(self, question: str) -> Optional[str]:
+        """
+        Answer a simple aggregate question (counts, mean/max/min, top value, missing
+        values, filtered counts) straight from the loaded DataFrame.
+
+        Returns None when no dataset is loaded or the question needs the LLM.
+        """
+        if self.current_data is None or not PANDAS_AVAILABLE:
+            return None
+        return data_intent_router.answer(
+            self.current_data, question,
+            total_rows=self.file_info.get('total_rows'),
+            numeric_summary=self._sampled_summary
+        )
+    
+    def get_query_schema(self) -> Optional[List[Dict[str, Any]]]:
+        """Column names, dtypes and example text values for structured query planning."""
+        if self.current_data is None or not PANDAS_AVAILABLE:
+            return None
+        if self._schema_cache is None or self._schema_cache[0] != self.dataset_version:
+            self._schema_cache = (self.dataset_version, describe_columns(self.current_data))
+        return self._schema_cache[1]
+    
+    def run_structured_query(self, query: Dict[str, Any]) -> Optional[str]:
+        """
+        Validate and execute a planner-produced structured query (filters, group-by,
+        aggregations, sort, limit) over the whole loaded DataFrame.
+
+        Returns the compact result as text for the LLM to phrase, or None if the
+        query does not fit the dataset.
+        """
+        if self.current_data is None or not PANDAS_AVAILABLE:
+            return None
+        df = self.current_data
+        try:
+            result = execute_query(validate_query(query, df), df)
+        except QueryError as e:
+            logger.info(f"Rejected structured query: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"Structured query failed: {e}")
+            return None
+        
+        total_rows = self.file_info.get('total_rows')
+        if total_rows is not None:
+            scope = f"computed over a {len(df)}-row random sample of {total_rows} rows"
+        else:
+            scope = f"computed over all {len(df)} rows"
+        if result.empty:
+            return f"Query result ({scope}): no matching rows."
+        return f"Query result ({scope}):\n{result.to_string(index=False, max_colwidth=60)}"
+    
     def query_data(self, query: str) -> str:
         """Execute queries on the current dataset."""
         if self.current_data is None:
@@ -281,6 +582,10 @@ KEY INSIGHTS AVAILABLE:
         try:
             df = self.current_data
             
+            answer = self.answer_locally(query)
+            if answer is not None:
+                return answer
+            
             # Simple query processing (can be enhanced with NLP)
             query_lower = query.lower()
             
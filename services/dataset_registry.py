@@ -0,0 +1,262 @@
+# services/dataset_registry.py
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from config import (
+    DATASET_MEMORY_BUDGET_BYTES, DATASET_SESSION_IDLE_SECONDS, DATASET_MAX_SESSIONS,
+    DATASET_SPILL_MAX_BYTES, MULTI_WORKER, STATE_DIR,
+)
+from services.data_processor import DataProcessor, data_processor, PANDAS_AVAILABLE
+from services.dataset_store import dataset_store
+
+if PANDAS_AVAILABLE:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SPILL_DIR = STATE_DIR / "datasets"
+
+DEFAULT_SESSION = "default"
+_SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def normalize_session_id(session_id) -> str:
+    """Client-supplied session IDs are used in file names, so only allow a safe subset."""
+    if session_id and _SESSION_ID_PATTERN.match(str(session_id)):
+        return str(session_id)
+    return DEFAULT_SESSION
+
+
+class DatasetRegistry:
+    """
+    Per-session DataProcessor instances with a shared memory budget.
+
+    Each session (a browser, a dataset ID) gets its own DataProcessor, so one
+    user's upload no longer replaces another's. When the loaded DataFrames
+    exceed `memory_budget` bytes, the least recently used sessions are spilled
+    to disk and transparently reloaded on their next access. The precomputed
+    context stays in memory, so a reload does not re-profile the data.
+
+    Sessions idle for `idle_seconds`, the least recently used beyond
+    `max_sessions`, and the oldest spilled ones once spill files exceed
+    `spill_max_bytes` are dropped entirely; their next access starts a new
+    processor, which reloads the session's upload from the dataset store.
+
+    get() and update_usage() may read or write files, so async callers run
+    them in an executor (data_executor for HTTP endpoints, the loop's default
+    executor for the voice WebSockets). Session records and stored datasets are read
+    outside the registry lock, so one session's reload does not hold up the
+    others, and a session's record is only re-read when its file changed.
+
+    With several worker processes, each session's latest upload is recorded in
+    the shared dataset store; a worker whose copy is out of date reloads it on
+    the next access, so any worker can serve any session.
+    """
+
+    def __init__(self, memory_budget: int, spill_dir: Path, shared: bool = MULTI_WORKER,
+                 idle_seconds: float = DATASET_SESSION_IDLE_SECONDS, max_sessions: int = DATASET_MAX_SESSIONS,
+                 spill_max_bytes: int = DATASET_SPILL_MAX_BYTES):
+        self.memory_budget = memory_budget
+        self.shared = shared
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max(1, max_sessions)
+        self.spill_max_bytes = spill_max_bytes
+        self._sessions: "OrderedDict[str, DataProcessor]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        # Spill file and its size per spilled session
+        self._spilled: Dict[str, Path] = {}
+        self._spill_sizes: Dict[str, int] = {}
+        # (digest, filename) of the stored upload each session has loaded
+        self._loaded: Dict[str, Dict[str, str]] = {}
+        # dataset_store.session_version of the record last checked per session
+        self._versions: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.RLock()
+        # Requests without a session ID keep sharing the module-level processor
+        self._sessions[DEFAULT_SESSION] = data_processor
+
+        # Each process spills into its own directory; those of exited processes are stale
+        for stale in spill_dir.glob("*"):
+            if stale.is_dir() and stale.name.isdigit() and not self._process_alive(int(stale.name)):
+                shutil.rmtree(stale, ignore_errors=True)
+            elif stale.suffix == ".pkl":
+                stale.unlink(missing_ok=True)
+        self.spill_dir = spill_dir / str(os.getpid())
+
+    @staticmethod
+    def _process_alive(pid: int) -> bool:
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass
+        return True
+
+    def get(self, session_id: str) -> DataProcessor:
+        """Return the session's processor, reloading its dataset if it was spilled."""
+        session_id = normalize_session_id(session_id)
+        with self._lock:
+            processor = self._sessions.get(session_id)
+            created = processor is None
+            if created:
+                processor = DataProcessor()
+                self._sessions[session_id] = processor
+            self._sessions.move_to_end(session_id)
+            self._last_used[session_id] = time.monotonic()
+            self._evict_sessions(keep=session_id)
+
+        # A restarted worker picks up the session's last upload; with several
+        # workers, another one may have taken a newer upload for it
+        if created or self.shared:
+            self._load_persisted(session_id, processor)
+
+        with self._lock:
+            if session_id in self._spilled and self._sessions.get(session_id) is processor:
+                self._restore(session_id, processor)
+        return processor
+
+    def update_usage(self, session_id: str, loaded: Optional[Dict[str, str]] = None):
+        """
+        Re-measure a session after its dataset changed and enforce the budget.
+        `loaded` is the dataset store entry the session now holds, if any.
+        """
+        session_id = normalize_session_id(session_id)
+        with self._lock:
+            processor = self._sessions.get(session_id)
+            if processor is None:
+                return
+            if loaded is not None:
+                self._loaded[session_id] = loaded
+            self._discard_spill(session_id)
+            self._sizes[session_id] = self._measure(processor)
+            self._enforce_budget(keep=session_id)
+
+    def _load_persisted(self, session_id: str, processor: DataProcessor):
+        """Attach the dataset recorded for a session (before a restart or by another worker), if newer and still stored."""
+        version = dataset_store.session_version(session_id)
+        if version is None or version == self._versions.get(session_id):
+            return
+        entry = dataset_store.session_entry(session_id)
+        stored = None
+        if entry and entry != self._loaded.get(session_id):
+            stored = dataset_store.load(entry["digest"])
+        with self._lock:
+            if stored is None:
+                self._versions[session_id] = version
+                return
+            # Skip if the session was dropped or re-uploaded while loading
+            if self._sessions.get(session_id) is not processor or dataset_store.session_version(session_id) != version:
+                return
+            df, result = stored
+            self._discard_spill(session_id)
+            processor.restore_result(df, result, entry.get("filename", "Unknown"))
+            self._loaded[session_id] = entry
+            self._versions[session_id] = version
+            self._sizes[session_id] = self._measure(processor)
+            self._enforce_budget(keep=session_id)
+
+    def _evict_sessions(self, keep: str):
+        """Drop idle sessions, then the least recently used beyond max_sessions."""
+        cutoff = time.monotonic() - self.idle_seconds
+        for session_id in list(self._sessions):
+            if session_id not in (keep, DEFAULT_SESSION) and self._last_used.get(session_id, 0) < cutoff:
+                self._drop(session_id)
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if session_id not in (keep, DEFAULT_SESSION):
+                self._drop(session_id)
+
+    def _drop(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        self._last_used.pop(session_id, None)
+        self._sizes.pop(session_id, None)
+        self._loaded.pop(session_id, None)
+        self._versions.pop(session_id, None)
+        self._discard_spill(session_id)
+        logger.info(f"Dropped dataset session {session_id}")
+
+    def _measure(self, processor: DataProcessor) -> int:
+        if processor.current_data is None:
+            return 0
+        return int(processor.current_data.memory_usage(deep=True).sum())
+
+    def _enforce_budget(self, keep: str):
+        total = sum(self._sizes.values())
+        for session_id in list(self._sessions):
+            if total <= self.memory_budget:
+                break
+            size = self._sizes.get(session_id, 0)
+            if session_id == keep or size == 0 or session_id not in self._sessions:
+                continue
+            if self._spill(session_id, self._sessions[session_id]):
+                total -= size
+
+    def _spill(self, session_id: str, processor: DataProcessor) -> bool:
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f"{session_id}.pkl"
+        try:
+            processor.current_data.to_pickle(path)
+        except Exception as e:
+            logger.warning(f"Could not spill dataset for session {session_id}: {e}")
+            return False
+        processor.current_data = None
+        self._sizes[session_id] = 0
+        self._spilled[session_id] = path
+        self._spill_sizes[session_id] = path.stat().st_size
+        logger.info(f"Spilled dataset for session {session_id} to disk")
+        self._enforce_spill_cap(keep=session_id)
+        return True
+
+    def _enforce_spill_cap(self, keep: str):
+        """Drop the least recently used spilled sessions once spill files exceed the cap."""
+        total = sum(self._spill_sizes.values())
+        for session_id in list(self._sessions):
+            if total <= self.spill_max_bytes:
+                break
+            if session_id != keep and session_id != DEFAULT_SESSION and session_id in self._spilled:
+                total -= self._spill_sizes.get(session_id, 0)
+                self._drop(session_id)
+
+    def _restore(self, session_id: str, processor: DataProcessor):
+        path = self._spilled[session_id]
+        try:
+            # dataset_version is unchanged, so the cached context stays valid
+            processor.current_data = pd.read_pickle(path)
+        except Exception as e:
+            # Keep the spill file so a later access can retry
+            logger.error(f"Could not reload dataset for session {session_id}: {e}")
+            return
+        self._discard_spill(session_id)
+        self._sizes[session_id] = self._measure(processor)
+        self._enforce_budget(keep=session_id)
+
+    def _discard_spill(self, session_id: str):
+        path = self._spilled.pop(session_id, None)
+        self._spill_sizes.pop(session_id, None)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "in_memory_bytes": sum(self._sizes.values()),
+                "memory_budget": self.memory_budget,
+                "spilled_sessions": len(self._spilled),
+                "spilled_bytes": sum(self._spill_sizes.values()),
+            }
+
+
+# Global instance
+dataset_registry = DatasetRegistry(DATASET_MEMORY_BUDGET_BYTES, SPILL_DIR)
@@ -0,0 +1,169 @@
+# services/dataset_store.py
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from config import DATASET_STORE_MAX_BYTES, DATASET_SESSION_TTL_SECONDS, STATE_DIR
+from services.data_processor import PANDAS_AVAILABLE, ARROW_AVAILABLE
+
+if PANDAS_AVAILABLE:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = STATE_DIR / "dataset_store"
+
+
+class DatasetStore:
+    """
+    On-disk cache of parsed uploads, keyed by a SHA-256 of the file content.
+
+    Each entry holds the parsed DataFrame in a columnar file (Parquet when
+    pyarrow is installed, pickle otherwise) plus the JSON upload result,
+    including the profile and AI insights. A repeated upload, or a session
+    after a restart, loads from here without re-parsing, re-profiling or
+    calling the LLM again. Total size is capped at `max_bytes`, and the least
+    recently used entries are evicted first. The digest is computed by
+    services/uploads.receive_upload while the upload is written to disk.
+
+    Session records (which dataset a session last loaded) expire after
+    `session_ttl_seconds`, or as soon as their dataset has been evicted.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, session_ttl_seconds: float = DATASET_SESSION_TTL_SECONDS):
+        self.directory = directory
+        self.sessions_dir = directory / "sessions"
+        self.max_bytes = max_bytes
+        self.session_ttl_seconds = session_ttl_seconds
+        self._lock = threading.Lock()
+        self.sessions_dir.mkdir(parents=True, exist_ok=True)
+
+    def _result_path(self, digest: str) -> Path:
+        return self.directory / f"{digest}.json"
+
+    def _data_paths(self, digest: str):
+        return self.directory / f"{digest}.parquet", self.directory / f"{digest}.pkl"
+
+    def load(self, digest: str) -> Optional[Tuple[Optional["pd.DataFrame"], Dict[str, Any]]]:
+        """Return (DataFrame or None, upload result) for a stored digest, or None on a miss."""
+        result_path = self._result_path(digest)
+        try:
+            with open(result_path) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        df = None
+        parquet_path, pickle_path = self._data_paths(digest)
+        try:
+            if parquet_path.exists():
+                df = pd.read_parquet(parquet_path)
+                os.utime(parquet_path)
+            elif pickle_path.exists():
+                df = pd.read_pickle(pickle_path)
+                os.utime(pickle_path)
+        except Exception as e:
+            logger.warning(f"Could not load stored dataset {digest[:12]}: {e}")
+            return None
+        os.utime(result_path)
+        return df, result
+
+    def save(self, digest: str, df: Optional["pd.DataFrame"], result: Dict[str, Any]):
+        """Persist a parsed upload; failures are logged and otherwise ignored."""
+        try:
+            if df is not None:
+                parquet_path, pickle_path = self._data_paths(digest)
+                written = False
+                if ARROW_AVAILABLE:
+                    try:
+                        df.to_parquet(parquet_path, index=True)
+                        written = True
+                    except Exception as e:
+                        # e.g. object columns holding mixed types
+                        logger.info(f"Parquet write failed, storing pickle instead: {e}")
+                        parquet_path.unlink(missing_ok=True)
+                if not written:
+                    df.to_pickle(pickle_path)
+
+            tmp_path = self._result_path(digest).with_suffix(".json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(result, f, default=str)
+            os.replace(tmp_path, self._result_path(digest))
+        except Exception as e:
+            logger.warning(f"Could not store dataset {digest[:12]}: {e}")
+            return
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for path in self.directory.iterdir():
+                if path.is_file():
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            # Remove whole entries (result + data) oldest first
+            for _, _, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                digest = path.name.split(".")[0]
+                for related in (self._result_path(digest), *self._data_paths(digest)):
+                    if related.exists():
+                        total -= related.stat().st_size
+                        related.unlink(missing_ok=True)
+            self._prune_sessions()
+
+    def _prune_sessions(self):
+        """Drop session records past their TTL or pointing at an evicted dataset."""
+        cutoff = time.time() - self.session_ttl_seconds
+        for path in self.sessions_dir.glob("*.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+                    continue
+                with open(path) as f:
+                    digest = json.load(f)["digest"]
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if not self._result_path(digest).exists():
+                path.unlink(missing_ok=True)
+
+    def remember_session(self, session_id: str, digest: str, filename: str) -> Dict[str, str]:
+        """
+        Record which stored dataset a session last loaded, so it survives restarts
+        and other worker processes can load it.
+        """
+        entry = {"digest": digest, "filename": filename}
+        path = self.sessions_dir / f"{session_id}.json"
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        return entry
+
+    def session_version(self, session_id: str) -> Optional[Tuple[int, int]]:
+        """Changes whenever the session's record is rewritten (each write replaces the file); None if there is none."""
+        try:
+            stat = (self.sessions_dir / f"{session_id}.json").stat()
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def session_entry(self, session_id: str) -> Optional[Dict[str, str]]:
+        """The {"digest", "filename"} a session last loaded, if recorded and not expired."""
+        path = self.sessions_dir / f"{session_id}.json"
+        try:
+            if time.time() - path.stat().st_mtime > self.session_ttl_seconds:
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+# Global instance
+dataset_store = DatasetStore(STORE_DIR, DATASET_STORE_MAX_BYTES)
@@ -0,0 +1,99 @@
+# services/executors.py
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException
+
+from config import (
+    GEMINI_EXECUTOR_WORKERS, GEMINI_EXECUTOR_QUEUE,
+    MURF_EXECUTOR_WORKERS, MURF_EXECUTOR_QUEUE,
+    ASSEMBLYAI_EXECUTOR_WORKERS, ASSEMBLYAI_EXECUTOR_QUEUE,
+    DATA_EXECUTOR_WORKERS, DATA_EXECUTOR_QUEUE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturated(HTTPException):
+    """Raised when a provider executor's queue is full; surfaces as 503 with Retry-After."""
+
+    def __init__(self, provider: str):
+        super().__init__(status_code=503, detail=f"{provider} is busy, please retry shortly", headers={"Retry-After": "1"})
+
+
+class ProviderExecutor:
+    """
+    A bounded thread pool for one provider's blocking calls.
+
+    At most `max_workers` calls run at once and at most `max_queue` more may
+    wait; further submissions fail fast with ExecutorSaturated instead of
+    piling up. HTTP endpoints use these pools, so a burst of requests to one
+    provider cannot exhaust the event loop's default executor, which the
+    WebSocket voice pipelines rely on.
+
+    A call stays in flight until its thread finishes, even if the awaiting
+    request is cancelled, so the bound reflects the threads actually busy.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-provider")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on this provider's pool and await its result."""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(self.name)
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._finished(None)
+            raise
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, future):
+        """Runs when the call's thread is done (or it was never submitted)."""
+        with self._lock:
+            self._in_flight -= 1
+            if future is None or future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+
+# Global instances
+gemini_executor = ProviderExecutor("gemini", GEMINI_EXECUTOR_WORKERS, GEMINI_EXECUTOR_QUEUE)
+murf_executor = ProviderExecutor("murf", MURF_EXECUTOR_WORKERS, MURF_EXECUTOR_QUEUE)
+assemblyai_executor = ProviderExecutor("assemblyai", ASSEMBLYAI_EXECUTOR_WORKERS, ASSEMBLYAI_EXECUTOR_QUEUE)
+# File parsing, profiling and dataset store I/O
+data_executor = ProviderExecutor("data", DATA_EXECUTOR_WORKERS, DATA_EXECUTOR_QUEUE)
+
+provider_executors = {
+    executor.name: executor
+    for executor in (gemini_executor, murf_executor, assemblyai_executor, data_executor)
+}
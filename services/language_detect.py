@@ -0,0 +1,207 @@
+# services/language_detect.py
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+# Non-Latin scripts that identify a supported language on their own
+_SCRIPT_RANGES = [
+    ("hiragana_katakana", 0x3040, 0x30FF),
+    ("hangul", 0x1100, 0x11FF),
+    ("hangul", 0x3130, 0x318F),
+    ("hangul", 0xAC00, 0xD7AF),
+    ("cjk", 0x4E00, 0x9FFF),
+    ("cjk", 0x3400, 0x4DBF),
+    ("devanagari", 0x0900, 0x097F),
+    ("arabic", 0x0600, 0x06FF),
+    ("arabic", 0x0750, 0x077F),
+    ("cyrillic", 0x0400, 0x04FF),
+]
+
+_SCRIPT_LANGUAGES = {
+    "hiragana_katakana": "japanese",
+    "hangul": "korean",
+    "devanagari": "hindi",
+    "arabic": "arabic",
+    "cyrillic": "russian",
+}
+
+# Short reference texts for the Latin-script languages. The character n-gram
+# profiles below are built from them once at import time.
+_LATIN_SAMPLES = {
+    "english": (
+        "The weather is nice today and I would like to go for a walk in the park. "
+        "Can you tell me what time the meeting starts this afternoon? "
+        "We have been working on this project for three months and it is almost finished. "
+        "Please send me the report before the end of the week so that I can review it. "
+        "I think that the new restaurant near the station has very good food. "
+        "Where is the nearest train station and how long does it take to get there? "
+        "She said that they were going to visit their friends during the holidays. "
+        "Thank you very much for your help, I really appreciate it. "
+        "What do you want to eat for dinner tonight? "
+        "The children are playing outside with the dog while their parents cook. "
+        "Which of these is yours, and why did he not call us yesterday? There was nothing we could do about it."
+    ),
+    "spanish": (
+        "El tiempo está muy agradable hoy y me gustaría dar un paseo por el parque. "
+        "¿Puedes decirme a qué hora empieza la reunión esta tarde? "
+        "Hemos estado trabajando en este proyecto durante tres meses y casi está terminado. "
+        "Por favor, envíame el informe antes del fin de semana para que pueda revisarlo. "
+        "Creo que el nuevo restaurante cerca de la estación tiene una comida muy buena. "
+        "¿Dónde está la estación de tren más cercana y cuánto tiempo se tarda en llegar? "
+        "Ella dijo que iban a visitar a sus amigos durante las vacaciones. "
+        "Muchas gracias por tu ayuda, de verdad lo aprecio. "
+        "¿Qué quieres comer para la cena esta noche? "
+        "Los niños están jugando afuera con el perro mientras sus padres cocinan. "
+        "¿Cuál de estos es tuyo y por qué no nos llamó ayer? No había nada que pudiéramos hacer, pero esta vez será diferente."
+    ),
+    "french": (
+        "Il fait très beau aujourd'hui et j'aimerais me promener dans le parc. "
+        "Peux-tu me dire à quelle heure commence la réunion cet après-midi ? "
+        "Nous travaillons sur ce projet depuis trois mois et il est presque terminé. "
+        "S'il te plaît, envoie-moi le rapport avant la fin de la semaine pour que je puisse le relire. "
+        "Je pense que le nouveau restaurant près de la gare a une très bonne cuisine. "
+        "Où se trouve la gare la plus proche et combien de temps faut-il pour y aller ? "
+        "Elle a dit qu'ils allaient rendre visite à leurs amis pendant les vacances. "
+        "Merci beaucoup pour ton aide, je l'apprécie vraiment. "
+        "Qu'est-ce que tu veux manger pour le dîner ce soir ? "
+        "Les enfants jouent dehors avec le chien pendant que leurs parents cuisinent. "
+        "Lequel de ceux-ci est le tien et pourquoi ne nous a-t-il pas appelés hier ? Il n'y avait rien à faire, mais cette fois ce sera différent."
+    ),
+    "german": (
+        "Das Wetter ist heute sehr schön und ich würde gerne im Park spazieren gehen. "
+        "Kannst du mir sagen, wann das Treffen heute Nachmittag beginnt? "
+        "Wir arbeiten seit drei Monaten an diesem Projekt und es ist fast fertig. "
+        "Bitte schick mir den Bericht vor dem Ende der Woche, damit ich ihn prüfen kann. "
+        "Ich glaube, dass das neue Restaurant in der Nähe des Bahnhofs sehr gutes Essen hat. "
+        "Wo ist der nächste Bahnhof und wie lange dauert es, dorthin zu kommen? "
+        "Sie sagte, dass sie in den Ferien ihre Freunde besuchen wollten. "
+        "Vielen Dank für deine Hilfe, ich weiß das wirklich zu schätzen. "
+        "Was möchtest du heute Abend zum Essen haben? "
+        "Die Kinder spielen draußen mit dem Hund, während ihre Eltern kochen. "
+        "Welches davon gehört dir, und warum hat er uns gestern nicht angerufen? Wir konnten nichts tun, aber diesmal wird es anders sein."
+    ),
+    "italian": (
+        "Il tempo è molto bello oggi e vorrei fare una passeggiata nel parco. "
+        "Puoi dirmi a che ora inizia la riunione questo pomeriggio? "
+        "Stiamo lavorando a questo progetto da tre mesi ed è quasi finito. "
+        "Per favore, mandami il rapporto prima della fine della settimana così posso controllarlo. "
+        "Penso che il nuovo ristorante vicino alla stazione abbia un cibo molto buono. "
+        "Dov'è la stazione dei treni più vicina e quanto tempo ci vuole per arrivarci? "
+        "Lei ha detto che sarebbero andati a trovare i loro amici durante le vacanze. "
+        "Grazie mille per il tuo aiuto, lo apprezzo davvero. "
+        "Cosa vuoi mangiare per cena stasera? "
+        "I bambini stanno giocando fuori con il cane mentre i loro genitori cucinano. "
+        "Quale di questi è tuo e perché non ci ha chiamato ieri? Non c'era niente da fare, ma questa volta sarà diverso."
+    ),
+    "portuguese": (
+        "O tempo está muito agradável hoje e eu gostaria de dar um passeio no parque. "
+        "Você pode me dizer a que horas começa a reunião esta tarde? "
+        "Estamos trabalhando neste projeto há três meses e ele está quase pronto. "
+        "Por favor, me envie o relatório antes do fim da semana para que eu possa revisá-lo. "
+        "Eu acho que o novo restaurante perto da estação tem uma comida muito boa. "
+        "Onde fica a estação de trem mais próxima e quanto tempo leva para chegar lá? "
+        "Ela disse que eles iam visitar os amigos durante as férias. "
+        "Muito obrigado pela sua ajuda, eu realmente agradeço. "
+        "O que você quer comer no jantar hoje à noite? "
+        "As crianças estão brincando lá fora com o cachorro enquanto os pais cozinham. "
+        "Qual destes é seu e por que ele não nos ligou ontem? Não havia nada a fazer, mas desta vez será diferente."
+    ),
+}
+
+_NGRAM_SIZES = (1, 2, 3)
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+def _ngrams(text: str) -> Counter:
+    counts = Counter()
+    for word in _WORD.findall(text.lower()):
+        padded = f" {word} "
+        for n in _NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                gram = padded[i:i + n]
+                if gram.strip():
+                    counts[gram] += 1
+    return counts
+
+
+def _build_profiles() -> Dict[str, Tuple[Dict[str, float], float]]:
+    """Per language: log-probability of each n-gram, plus the log-probability of an unseen one."""
+    profiles = {}
+    for language, sample in _LATIN_SAMPLES.items():
+        counts = _ngrams(sample)
+        # Add-one smoothing over a vocabulary twice the size of what was seen
+        total = sum(counts.values()) + 2 * len(counts)
+        log_probs = {gram: math.log((count + 1) / total) for gram, count in counts.items()}
+        profiles[language] = (log_probs, math.log(1 / total))
+    return profiles
+
+
+_PROFILES = _build_profiles()
+
+
+def _script_of(char: str) -> Optional[str]:
+    code = ord(char)
+    for script, low, high in _SCRIPT_RANGES:
+        if low <= code <= high:
+            return script
+    return None
+
+
+def _detect_script(text: str) -> Optional[Tuple[str, float]]:
+    letters = [char for char in text if char.isalpha()]
+    if not letters:
+        return None
+    scripts = Counter(_script_of(char) for char in letters)
+    scripts.pop(None, None)
+    if not scripts:
+        return None
+
+    share = sum(scripts.values()) / len(letters)
+    # Kana marks Japanese even when most characters are kanji
+    if scripts["hiragana_katakana"]:
+        return "japanese", share
+    script, _ = scripts.most_common(1)[0]
+    if script == "cjk":
+        return "chinese", share
+    return _SCRIPT_LANGUAGES[script], share
+
+
+def _detect_latin(text: str) -> Optional[Tuple[str, float]]:
+    grams = _ngrams(unicodedata.normalize("NFC", text))
+    if not grams:
+        return None
+    scores = {}
+    for language, (log_probs, unseen) in _PROFILES.items():
+        scores[language] = sum(count * log_probs.get(gram, unseen) for gram, count in grams.items())
+    # Posterior under a uniform prior. Each character is counted in every n-gram
+    # order, so the log-likelihoods are tempered to keep confidences calibrated.
+    best = max(scores.values())
+    weights = {language: math.exp((score - best) / len(_NGRAM_SIZES)) for language, score in scores.items()}
+    total = sum(weights.values())
+    language = max(weights, key=weights.get)
+    return language, weights[language] / total
+
+
+def detect_language_locally(text: str, min_letters: int = 12) -> Tuple[Optional[str], float]:
+    """
+    Detect the language of text offline.
+
+    Non-Latin scripts (Japanese, Chinese, Korean, Hindi, Arabic, Russian) are
+    identified from Unicode script ranges; Latin-script text is scored against
+    character 1-3-gram profiles of English, Spanish, French, German, Italian
+    and Portuguese. Returns (language name, confidence in 0..1), or (None, 0.0)
+    when the text has no letters. Latin text shorter than `min_letters` letters
+    gets its confidence halved, since a few characters rarely settle it.
+    """
+    script = _detect_script(text)
+    if script is not None and script[1] >= 0.5:
+        return script
+    latin = _detect_latin(text)
+    if latin is None:
+        return None, 0.0
+    language, confidence = latin
+    if sum(char.isalpha() for char in text) < min_letters:
+        confidence /= 2
+    return language, confidence
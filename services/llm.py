@@ -1,7 +1,10 @@
 # services/llm.py
-import google.generativeai as genai
-from typing import List, Dict, Any, Tuple
-from config import get_api_key
+import json
+import re
+from typing import List, Dict, Any, Tuple, Iterator, Optional, Union
+from config import get_api_key, CHAT_SUMMARY_MAX_CHARS
+from services.clients import get_gemini_model
+from services.conversation import ConversationHistory, Turn
 
 # Configure logging
 import logging
@@ -30,34 +33,211 @@ You can handle two types of questions:
 Only ask users to upload data if they're specifically asking about analyzing their own data/files, not for general knowledge questions.
 """
 
-def get_llm_response(user_query: str, history: List[Dict[str, Any]], data_context: str = None) -> Tuple[str, List[Dict[str, Any]]]:
-    """Gets a response from the Gemini LLM and updates chat history."""
+# A sentence ends at terminal punctuation followed by whitespace, matching the
+# split used for TTS in the WebSocket pipelines.
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.?!])\s+')
+
+
+class SentenceSplitter:
+    """
+    Incremental sentence detector for streamed LLM output.
+
+    Feed text fragments as they arrive; complete sentences are returned as soon
+    as the boundary after them is seen, and the trailing partial sentence is kept
+    until more text arrives or flush() is called.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        parts = _SENTENCE_BOUNDARY.split(self._buffer)
+        # The last part has no boundary after it yet
+        self._buffer = parts.pop()
+        return [part.strip() for part in parts if part.strip()]
+
+    def flush(self) -> Optional[str]:
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return remainder or None
+
+
+# Mirrors the operations accepted by services/structured_query.validate_query
+_QUERY_FORMAT = """{
+  "filters": [{"column": "<column>", "op": "==|!=|>|>=|<|<=|in|not_in|contains", "value": <value or list>}],
+  "group_by": ["<column>"],
+  "aggregations": [{"column": "<column or *>", "func": "count|sum|mean|median|min|max|nunique"}],
+  "sort": {"by": "<column, or func_column for an aggregate, e.g. mean_price>", "descending": true},
+  "limit": <1-20>
+}"""
+
+query_planner_instructions = f"""
+You translate questions about a tabular dataset into a structured query.
+Reply with JSON only, in this shape (omit keys you do not need):
+{_QUERY_FORMAT}
+Use only the column names listed. Text values are matched case-insensitively.
+Use the column "*" with func "count" to count rows.
+If the question cannot be answered from the dataset's rows (general knowledge,
+small talk, or opinions), reply with {{"query": null}}.
+"""
+
+
+def _build_query(user_query: str, data_context: str = None, in_character: bool = False, query_result: str = None) -> str:
+    """Attach the data context, and any locally computed query result, to the user query."""
+    if data_context and "No data currently loaded" not in data_context:
+        instruction = "Answer based on the specific data shown above"
+        if query_result:
+            data_context = f"{data_context}\n{query_result}\n"
+            instruction += "; the query result is exact, so prefer it over the sample rows"
+        if in_character:
+            instruction += ", but maintain your character personality"
+        return f"IMPORTANT - USE THIS DATA TO ANSWER:\n{data_context}\n\nUser Question: {user_query}\n\n{instruction}."
+    return user_query
+
+
+def plan_data_query(user_query: str, schema: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Ask Gemini for a structured query answering user_query over a dataset with
+    the given schema. Only column names, dtypes and a few example values are
+    sent, so the prompt size does not grow with the data. Returns None when the
+    question needs no query or planning fails.
+    """
+    api_key = get_api_key("GEMINI_API_KEY")
+    if not api_key or not schema:
+        return None
+    try:
+        model = get_gemini_model(api_key, query_planner_instructions)
+        prompt = f"Columns:\n{json.dumps(schema)}\n\nQuestion: {user_query}"
+        response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+        plan = json.loads(response.text)
+    except Exception as e:
+        logger.warning(f"Could not plan data query: {e}")
+        return None
+    if not isinstance(plan, dict) or plan.get("query", True) is None:
+        return None
+    return plan
+
+
+# A bounded ConversationHistory, or a plain list of role/parts dicts
+History = Union[ConversationHistory, List[Dict[str, Any]]]
+
+
+def _gemini_history(history: History) -> List[Dict[str, Any]]:
+    if isinstance(history, ConversationHistory):
+        return history.as_gemini_history()
+    return history
+
+
+def summarize_turns(previous_summary: str, turns: List[Turn]) -> Optional[str]:
+    """Fold conversation turns into a running summary with one short Gemini call."""
+    api_key = get_api_key("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    transcript = "\n".join(f"User: {user_text}\nAssistant: {model_text}" for user_text, model_text in turns)
+    prompt = f"""
+Update the running summary of a voice conversation with the new turns below.
+Keep names, numbers, decisions and user preferences; drop small talk.
+Reply with the summary only, under {CHAT_SUMMARY_MAX_CHARS} characters.
+
+Current summary:
+{previous_summary or "(none)"}
+
+New turns:
+{transcript}
+"""
+    response = get_gemini_model(api_key).generate_content(prompt)
+    return response.text
+
+
+def record_turn(history: History, user_query: str, response: str):
+    """
+    Store a completed turn as the plain question and reply, without the data
+    context that was attached to the prompt. A ConversationHistory that exceeds
+    its token budget is compacted in the background, so this never blocks on
+    the summary call.
+    """
+    if isinstance(history, ConversationHistory):
+        history.add_turn(user_query, response)
+        if history.over_budget():
+            history.compact_in_background(summarize_turns)
+    else:
+        history.append({"role": "user", "parts": [user_query]})
+        history.append({"role": "model", "parts": [response]})
+
+
+def _stream_chat(instructions: str, history: History, query: str, user_query: str) -> Iterator[str]:
+    """
+    Yields response text from Gemini as it is generated.
+
+    On success the turn (user_query and the full reply) is recorded in the
+    caller's history once the stream is exhausted.
+    """
+    api_key = get_api_key("GEMINI_API_KEY")
+    if not api_key:
+        yield "Please configure your Gemini API key in the settings to use the AI assistant."
+        return
+
+    produced = False
+    try:
+        model = get_gemini_model(api_key, instructions)
+        chat = model.start_chat(history=_gemini_history(history))
+
+        parts = []
+        response = chat.send_message(query, stream=True)
+        for chunk in response:
+            text = chunk.text
+            if text:
+                produced = True
+                parts.append(text)
+                yield text
+
+        record_turn(history, user_query, "".join(parts))
+    except Exception as e:
+        logger.error(f"Error streaming LLM response: {e}")
+        if not produced:
+            yield "I'm sorry, I encountered an error while processing your request. Please check your API key configuration."
+
+
+def stream_llm_response(user_query: str, history: History, data_context: str = None, query_result: str = None) -> Iterator[str]:
+    """Streaming variant of get_llm_response; updates history in place when done."""
+    return _stream_chat(system_instructions, history, _build_query(user_query, data_context, query_result=query_result), user_query)
+
+
+def stream_persona_response(user_query: str, history: History, data_context: str = None, persona_config: Dict[str, Any] = None, query_result: str = None) -> Iterator[str]:
+    """Streaming variant of get_persona_response; updates history in place when done."""
+    if persona_config and 'system_instructions' in persona_config:
+        persona_instructions = persona_config['system_instructions']
+    else:
+        persona_instructions = system_instructions
+    return _stream_chat(persona_instructions, history, _build_query(user_query, data_context, in_character=True, query_result=query_result), user_query)
+
+
+def get_llm_response(user_query: str, history: History, data_context: str = None, query_result: str = None) -> Tuple[str, History]:
+    """Gets a response from the Gemini LLM and records the turn in history."""
     try:
         # Check if API key is available
         api_key = get_api_key("GEMINI_API_KEY")
         if not api_key:
             return "Please configure your Gemini API key in the settings to use the AI assistant.", history
         
-        # Configure with current API key
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=system_instructions)
-        chat = model.start_chat(history=history)
+        # Reuse the cached model for the current API key
+        model = get_gemini_model(api_key, system_instructions)
+        chat = model.start_chat(history=_gemini_history(history))
         
         # Add data context if available
-        if data_context and "No data currently loaded" not in data_context:
-            enhanced_query = f"IMPORTANT - USE THIS DATA TO ANSWER:\n{data_context}\n\nUser Question: {user_query}\n\nAnswer based on the specific data shown above."
-        else:
-            enhanced_query = user_query
+        enhanced_query = _build_query(user_query, data_context, query_result=query_result)
             
         response = chat.send_message(enhanced_query)
-        return response.text, chat.history
+        record_turn(history, user_query, response.text)
+        return response.text, history
     except Exception as e:
         logger.error(f"Error getting LLM response: {e}")
         return "I'm sorry, I encountered an error while processing your request. Please check your API key configuration.", history
 
 
-def get_persona_response(user_query: str, history: List[Dict[str, Any]], data_context: str = None, persona_config: Dict[str, Any] = None) -> Tuple[str, List[Dict[str, Any]]]:
-    """Gets a persona-based response from the Gemini LLM and updates chat history."""
+def get_persona_response(user_query: str, history: History, data_context: str = None, persona_config: Dict[str, Any] = None, query_result: str = None) -> Tuple[str, History]:
+    """Gets a persona-based response from the Gemini LLM and records the turn in history."""
     try:
         # Check if API key is available
         api_key = get_api_key("GEMINI_API_KEY")
@@ -70,34 +250,35 @@ def get_persona_response(user_query: str, history: List[Dict[str, Any]], data_co
         else:
             persona_instructions = system_instructions
         
-        # Configure with current API key
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=persona_instructions)
-        chat = model.start_chat(history=history)
+        # Reuse the cached model for the current API key and persona
+        model = get_gemini_model(api_key, persona_instructions)
+        chat = model.start_chat(history=_gemini_history(history))
         
         # Add data context if available
-        if data_context and "No data currently loaded" not in data_context:
-            enhanced_query = f"IMPORTANT - USE THIS DATA TO ANSWER:\n{data_context}\n\nUser Question: {user_query}\n\nAnswer based on the specific data shown above, but maintain your character personality."
-        else:
-            enhanced_query = user_query
+        enhanced_query = _build_query(user_query, data_context, in_character=True, query_result=query_result)
             
         response = chat.send_message(enhanced_query)
-        return response.text, chat.history
+        record_turn(history, user_query, response.text)
+        return response.text, history
     except Exception as e:
         logger.error(f"Error getting persona LLM response: {e}")
         return "I'm sorry, I encountered an error while processing your request. Please check your API key configuration.", history
 
+# Returned by analyze_data_with_llm when no insights could be generated
+ANALYSIS_NO_KEY_MESSAGE = "Please configure your Gemini API key in the settings to analyze data."
+ANALYSIS_ERROR_MESSAGE = "I've processed your data but encountered an issue generating insights. The file was uploaded successfully."
+ANALYSIS_FALLBACK_MESSAGES = (ANALYSIS_NO_KEY_MESSAGE, ANALYSIS_ERROR_MESSAGE)
+
 def analyze_data_with_llm(analysis_result: Dict[str, Any], user_question: str = None) -> str:
     """Generate insights from data analysis using LLM."""
     try:
         # Check if API key is available
         api_key = get_api_key("GEMINI_API_KEY")
         if not api_key:
-            return "Please configure your Gemini API key in the settings to analyze data."
+            return ANALYSIS_NO_KEY_MESSAGE
         
-        # Configure with current API key
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=system_instructions)
+        # Reuse the cached model for the current API key
+        model = get_gemini_model(api_key, system_instructions)
         
         # Create analysis prompt
         prompt = f"""
@@ -127,4 +308,4 @@ Keep the response conversational and under 1200 characters for voice delivery.
         
     except Exception as e:
         logger.error(f"Error analyzing data with LLM: {e}")
-        return "I've processed your data but encountered an issue generating insights. The file was uploaded successfully."
\ No newline at end of file
+        return ANALYSIS_ERROR_MESSAGE
\ No newline at end of file
@@ -0,0 +1,121 @@
+# services/pdf_pages.py
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional, Tuple
+
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+# Below this many pages the pool's startup and IPC cost outweighs the gain
+MIN_PAGES_FOR_POOL = 8
+
+# (page number, page text, raw tables as lists of rows)
+PageResult = Tuple[int, Optional[str], List[list]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# Forking a process that runs the event loop and provider client threads can
+# copy held locks into the child, so workers start from a clean interpreter
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def extract_page_range(path: str, first_page: int, last_page: int) -> List[PageResult]:
+    """
+    Extract text and tables from pages first_page..last_page (1-based, inclusive).
+
+    Runs in pool workers, each of which reopens the document from the shared path
+    and only parses the pages it was assigned.
+    """
+    results = []
+    with pdfplumber.open(path, pages=list(range(first_page, last_page + 1))) as pdf:
+        for page in pdf.pages:
+            results.append((page.page_number, page.extract_text(), page.extract_tables()))
+            # Drop the page's cached layout objects before moving on
+            page.close()
+    return results
+
+
+def count_pages(path: str) -> int:
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(_START_METHOD))
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool(broken: ProcessPoolExecutor):
+    """Forget a pool whose worker died (e.g. OOM-killed) so the next call starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_serial(path: str, first_page: int, last_page: int) -> Iterator[PageResult]:
+    with pdfplumber.open(path, pages=list(range(first_page, last_page + 1))) as pdf:
+        for page in pdf.pages:
+            yield page.page_number, page.extract_text(), page.extract_tables()
+            page.close()
+
+
+def _iter_pool(path: str, first_page: int, last_page: int, workers: int) -> Iterator[PageResult]:
+    # A few ranges per worker keeps the pool busy when page costs are uneven
+    page_count = last_page - first_page + 1
+    range_count = min(page_count, workers * 4)
+    size = -(-page_count // range_count)
+    ranges = [(start, min(start + size - 1, last_page)) for start in range(first_page, last_page + 1, size)]
+
+    pool = _get_pool(workers)
+    futures = []
+    try:
+        for first, last in ranges:
+            futures.append(pool.submit(extract_page_range, path, first, last))
+        for future in futures:
+            yield from future.result()
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def iter_pages(path: str, page_count: int, workers: int) -> Iterator[PageResult]:
+    """
+    Extract pages 1..page_count of the PDF at `path`, split into contiguous page
+    ranges across `workers` processes. Results are yielded in page order as
+    each range completes; closing the generator early cancels ranges that have
+    not started yet.
+
+    If a worker dies, the broken pool is replaced and the remaining pages are
+    retried once on a fresh pool, then extracted in this process.
+    """
+    if workers <= 1 or page_count < MIN_PAGES_FOR_POOL:
+        yield from _iter_serial(path, 1, page_count)
+        return
+
+    next_page = 1
+    for _ in range(2):
+        try:
+            for result in _iter_pool(path, next_page, page_count, workers):
+                yield result
+                next_page = result[0] + 1
+            return
+        except BrokenProcessPool as e:
+            logger.warning(f"PDF page worker died ({e}); retrying from page {next_page}")
+    yield from _iter_serial(path, next_page, page_count)
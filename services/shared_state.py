@@ -0,0 +1,66 @@
+# services/shared_state.py
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState:
+    """
+    Small key/value store shared by all worker processes on one machine.
+
+    Backed by a SQLite file in WAL mode, so writes from one worker are visible
+    to the others. Readers call has_changed() first, which only asks SQLite
+    whether another connection has committed since the last check, so polling
+    on every request is cheap.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shared_kv ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        try:
+            # API keys may be stored here; keep the file private to this user
+            os.chmod(path, 0o600)
+        except OSError:
+            pass
+        self._data_version: Optional[int] = None
+
+    def has_changed(self) -> bool:
+        """True on the first call and whenever another process has written since the last call."""
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            changed = version != self._data_version
+            self._data_version = version
+            return changed
+
+    def get_all(self, namespace: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM shared_kv WHERE namespace = ?", (namespace,)).fetchall()
+        return dict(rows)
+
+    def set_many(self, namespace: str, values: Dict[str, str]):
+        if not values:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO shared_kv (namespace, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value",
+                [(namespace, key, value) for key, value in values.items()]
+            )
+
+    def clear(self):
+        """Forget everything; called once by the launcher before workers start."""
+        with self._lock:
+            self._conn.execute("DELETE FROM shared_kv")
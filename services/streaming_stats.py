@@ -0,0 +1,189 @@
+# services/streaming_stats.py
+import logging
+import warnings
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Text columns: object/str from the default parser, string[pyarrow] from Arrow-backed parsing
+TEXT_DTYPES = ['object', 'string']
+
+
+class StreamingCSVProfiler:
+    """
+    Online dataset profile built from DataFrame chunks.
+
+    Keeps exact per-column counts, means, variances (Chan's parallel update),
+    min/max and null counts, approximate top-k category counts, the first rows
+    for previews, and a uniform random sample of rows whose size is bounded by
+    `sample_memory_bytes`. Memory use is independent of the number of rows.
+    """
+
+    def __init__(self, sample_memory_bytes: int, max_categories: int = 10000, preview_rows: int = 5, seed: int = 0):
+        self.sample_memory_bytes = sample_memory_bytes
+        self.max_categories = max_categories
+        self.preview_rows = preview_rows
+        self.rows = 0
+        self.columns: List[str] = []
+        self.dtypes: Dict[str, str] = {}
+        self.null_counts: Dict[str, int] = {}
+        self.memory_usage = 0
+        self.preview: Optional[pd.DataFrame] = None
+        self.sample: Optional[pd.DataFrame] = None
+        self.sample_rows: Optional[int] = None
+        self._numeric: List[str] = []
+        self._n = self._mean = self._m2 = self._min = self._max = None
+        self._categories: Dict[str, Counter] = {}
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: pd.DataFrame):
+        if self.preview is None:
+            self._start(chunk)
+
+        chunk_numeric = set(chunk.select_dtypes(include=['number']).columns)
+        # A column stays numeric only if every chunk parsed it as numeric
+        demoted = [col for col in self._numeric if col not in chunk_numeric]
+        if demoted:
+            self._drop_numeric(demoted)
+
+        for col in chunk.columns:
+            self.null_counts[col] = self.null_counts.get(col, 0) + int(chunk[col].isna().sum())
+            if col in self._numeric:
+                # e.g. int64 in one chunk and float64 (with NaNs) in another
+                try:
+                    self.dtypes[col] = str(np.result_type(self.dtypes[col], chunk[col].dtype))
+                except TypeError:
+                    self.dtypes[col] = str(chunk[col].dtype)
+            else:
+                self.dtypes[col] = str(chunk[col].dtype)
+        self.memory_usage += int(chunk.memory_usage(deep=True).sum())
+
+        if self._numeric:
+            self._update_moments(chunk[self._numeric].to_numpy(dtype="float64", na_value=np.nan))
+        for col in self._categories:
+            self._update_categories(col, chunk[col])
+        self._update_sample(chunk)
+        self.rows += len(chunk)
+
+    def _start(self, chunk: pd.DataFrame):
+        self.columns = list(chunk.columns)
+        self.preview = chunk.head(self.preview_rows)
+        self._numeric = list(chunk.select_dtypes(include=['number']).columns)
+        self.dtypes = chunk.dtypes.astype(str).to_dict()
+        width = len(self._numeric)
+        self._n = np.zeros(width)
+        self._mean = np.zeros(width)
+        self._m2 = np.zeros(width)
+        self._min = np.full(width, np.inf)
+        self._max = np.full(width, -np.inf)
+        self._categories = {
+            col: Counter() for col in chunk.select_dtypes(include=TEXT_DTYPES).columns[:5]
+        }
+
+        # Size the sample from the observed bytes per row
+        bytes_per_row = max(1, int(chunk.memory_usage(deep=True).sum()) // max(1, len(chunk)))
+        self.sample_rows = max(self.preview_rows, self.sample_memory_bytes // bytes_per_row)
+
+    def _drop_numeric(self, columns: List[str]):
+        keep = [i for i, col in enumerate(self._numeric) if col not in columns]
+        self._numeric = [self._numeric[i] for i in keep]
+        self._n, self._mean, self._m2 = self._n[keep], self._mean[keep], self._m2[keep]
+        self._min, self._max = self._min[keep], self._max[keep]
+
+    def _update_moments(self, block: np.ndarray):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            n_b = np.count_nonzero(~np.isnan(block), axis=0).astype("float64")
+            mean_b = np.where(n_b > 0, np.nanmean(block, axis=0), 0.0)
+            m2_b = np.where(n_b > 0, np.nansum((block - mean_b) ** 2, axis=0), 0.0)
+            if len(block):
+                self._min = np.fmin(self._min, np.nanmin(block, axis=0))
+                self._max = np.fmax(self._max, np.nanmax(block, axis=0))
+
+        n = self._n + n_b
+        delta = mean_b - self._mean
+        safe_n = np.where(n > 0, n, 1)
+        self._mean = self._mean + delta * n_b / safe_n
+        self._m2 = self._m2 + m2_b + delta ** 2 * self._n * n_b / safe_n
+        self._n = n
+
+    def _update_categories(self, col: str, values: pd.Series):
+        counts = self._categories[col]
+        counts.update(values.value_counts().to_dict())
+        if len(counts) > self.max_categories:
+            # Keep the heaviest half; counts for pruned rare values become approximate
+            self._categories[col] = Counter(dict(counts.most_common(self.max_categories // 2)))
+
+    def _update_sample(self, chunk: pd.DataFrame):
+        # Bottom-k sampling on random keys gives a uniform sample across all chunks
+        keyed = chunk.assign(_sample_key=self._rng.random(len(chunk)))
+        if self.sample is not None:
+            keyed = pd.concat([self.sample, keyed])
+        self.sample = keyed.nsmallest(self.sample_rows, "_sample_key")
+
+    def numeric_summary(self) -> Dict[str, Dict[str, float]]:
+        """describe()-style statistics; quartiles are estimated from the sample."""
+        sample = self.get_sample()
+        summary = {}
+        for i, col in enumerate(self._numeric):
+            n = self._n[i]
+            values = sample[col].to_numpy(dtype="float64", na_value=np.nan)
+            values = values[~np.isnan(values)]
+            q25, q50, q75 = np.percentile(values, [25, 50, 75]) if len(values) else (np.nan,) * 3
+            summary[col] = {
+                "count": float(n),
+                "mean": float(self._mean[i]) if n > 0 else float("nan"),
+                "std": float(np.sqrt(self._m2[i] / (n - 1))) if n > 1 else float("nan"),
+                "min": float(self._min[i]) if n > 0 else float("nan"),
+                "25%": float(q25),
+                "50%": float(q50),
+                "75%": float(q75),
+                "max": float(self._max[i]) if n > 0 else float("nan"),
+            }
+        return summary
+
+    def get_sample(self) -> pd.DataFrame:
+        """The bounded row sample in original file order."""
+        if self.sample is None:
+            return pd.DataFrame()
+        return self.sample.drop(columns="_sample_key").sort_index()
+
+    def analysis(self) -> Dict[str, Any]:
+        """Same structure as DataProcessor._analyze_dataframe, computed from the online state."""
+        numeric_summary = self.numeric_summary()
+        analysis = {
+            "basic_info": {
+                "rows": self.rows,
+                "columns": len(self.columns),
+                "memory_usage": self.memory_usage,
+                "missing_values": dict(self.null_counts)
+            },
+            "column_types": {col: self.dtypes.get(col, "object") for col in self.columns},
+            "numeric_summary": numeric_summary,
+            "categorical_summary": {},
+            "key_insights": [],
+            "sampled_rows": len(self.get_sample())
+        }
+
+        for col, stats in numeric_summary.items():
+            if stats["count"] > 0:
+                analysis["key_insights"].append(
+                    f"{col}: Average {stats['mean']:.2f}, Range {stats['min']:.2f} to {stats['max']:.2f}"
+                )
+
+        for col, counts in self._categories.items():
+            if col in self._numeric:
+                continue
+            value_counts = dict(counts.most_common(5))
+            analysis["categorical_summary"][col] = value_counts
+            if value_counts:
+                top_value, top_count = next(iter(value_counts.items()))
+                analysis["key_insights"].append(
+                    f"{col}: Most common value is '{top_value}' ({top_count} occurrences)"
+                )
+
+        return analysis
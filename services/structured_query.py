@@ -0,0 +1,213 @@
+# services/structured_query.py
+import logging
+import re
+from typing import Dict, Any, List
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FILTER_OPS = {"==", "!=", ">", ">=", "<", "<=", "in", "not_in", "contains"}
+AGG_FUNCS = {"count", "sum", "mean", "median", "min", "max", "nunique"}
+MAX_FILTERS = 5
+MAX_GROUP_BY = 3
+MAX_AGGREGATIONS = 6
+MAX_LIMIT = 20
+
+# Aggregate and filter phrasing that suggests a question about the data even when
+# no column is named. Everyday words ("most", "top", "data", "file", "per") are
+# left out, so small talk during a data session does not cost a planning call.
+_DATA_PHRASES = re.compile(
+    r"\b(how many|how much|number of|count of|average|mean of|median|total|sum of|"
+    r"maximum|minimum|highest|lowest|largest|smallest|percentage|proportion|ratio|"
+    r"more than|less than|fewer than|greater than|at least|at most|"
+    r"group(ed)? by|broken down by|breakdown|distribution)\b"
+)
+
+
+def may_need_query(question: str, schema: List[Dict[str, Any]]) -> bool:
+    """
+    Cheap check before asking the planner: True when the question names a
+    column, one of its example values, or uses aggregate/filter phrasing.
+    Small talk and general questions skip the extra LLM call.
+    """
+    text = re.sub(r"[_\-]+", " ", question.lower())
+    if _DATA_PHRASES.search(text):
+        return True
+    for entry in schema:
+        names = [entry["column"]] + entry.get("examples", [])
+        for name in names:
+            name = re.sub(r"[_\-]+", " ", str(name).lower()).strip()
+            if len(name) > 2 and re.search(rf"\b{re.escape(name)}s?\b", text):
+                return True
+    return False
+
+
+class QueryError(ValueError):
+    """Raised when a structured query does not fit the loaded dataset."""
+
+
+def _check_column(df: pd.DataFrame, column, allow_star: bool = False) -> str:
+    if allow_star and column == "*":
+        return column
+    if column not in df.columns:
+        raise QueryError(f"Unknown column: {column!r}")
+    return column
+
+
+def validate_query(query: Dict[str, Any], df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Check a planner-produced query against the DataFrame's columns and the
+    supported operations, returning a normalized copy. Raises QueryError.
+    """
+    if not isinstance(query, dict):
+        raise QueryError("Query must be an object")
+
+    filters = query.get("filters") or []
+    group_by = query.get("group_by") or []
+    aggregations = query.get("aggregations") or []
+    if not isinstance(filters, list) or not isinstance(group_by, list) or not isinstance(aggregations, list):
+        raise QueryError("filters, group_by and aggregations must be lists")
+    if len(filters) > MAX_FILTERS or len(group_by) > MAX_GROUP_BY or len(aggregations) > MAX_AGGREGATIONS:
+        raise QueryError("Query is too large")
+
+    normalized_filters = []
+    for item in filters:
+        if not isinstance(item, dict) or item.get("op") not in FILTER_OPS:
+            raise QueryError(f"Invalid filter: {item!r}")
+        column = _check_column(df, item.get("column"))
+        value = item.get("value")
+        if item["op"] == "contains" and pd.api.types.is_numeric_dtype(df[column]):
+            raise QueryError("contains only applies to text columns")
+        if item["op"] in ("in", "not_in") and not isinstance(value, list):
+            value = [value]
+        normalized_filters.append({"column": column, "op": item["op"], "value": value})
+
+    group_by = [_check_column(df, column) for column in group_by]
+
+    normalized_aggs = []
+    for item in aggregations:
+        if not isinstance(item, dict) or item.get("func") not in AGG_FUNCS:
+            raise QueryError(f"Invalid aggregation: {item!r}")
+        column = _check_column(df, item.get("column", "*"), allow_star=True)
+        if column == "*" and item["func"] != "count":
+            raise QueryError("Only count can be applied to all rows")
+        if item["func"] not in ("count", "nunique") and not pd.api.types.is_numeric_dtype(df[column]):
+            raise QueryError(f"{item['func']} needs a numeric column, {column!r} is not")
+        normalized_aggs.append({"column": column, "func": item["func"]})
+
+    sort = query.get("sort")
+    if sort is not None and (not isinstance(sort, dict) or not sort.get("by")):
+        raise QueryError(f"Invalid sort: {sort!r}")
+
+    try:
+        limit = int(query.get("limit") or MAX_LIMIT)
+    except (TypeError, ValueError):
+        raise QueryError(f"Invalid limit: {query.get('limit')!r}")
+
+    return {
+        "filters": normalized_filters,
+        "group_by": group_by,
+        "aggregations": normalized_aggs,
+        "sort": sort,
+        "limit": max(1, min(limit, MAX_LIMIT)),
+    }
+
+
+def _coerce(series: pd.Series, value):
+    """Convert a JSON value to something comparable with the column."""
+    if isinstance(value, list):
+        return [_coerce(series, item) for item in value]
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise QueryError(f"{series.name!r} is numeric, got {value!r}")
+    if pd.api.types.is_datetime64_any_dtype(series):
+        try:
+            return pd.Timestamp(value)
+        except (TypeError, ValueError):
+            raise QueryError(f"{series.name!r} holds dates, got {value!r}")
+    return str(value).strip().lower()
+
+
+def _filter_mask(df: pd.DataFrame, item: Dict[str, Any]) -> pd.Series:
+    series = df[item["column"]]
+    value = _coerce(series, item["value"])
+    op = item["op"]
+    # Text compares case-insensitively, since the planner only sees a few example values
+    if isinstance(value, str) or (isinstance(value, list) and value and isinstance(value[0], str)):
+        series = series.astype("string").str.strip().str.lower()
+
+    if op == "contains":
+        return series.astype("string").str.contains(str(value), case=False, regex=False)
+    if op == "in":
+        return series.isin(value)
+    if op == "not_in":
+        return ~series.isin(value)
+    return {
+        "==": series == value, "!=": series != value,
+        ">": series > value, ">=": series >= value,
+        "<": series < value, "<=": series <= value,
+    }[op]
+
+
+def _aggregate_name(agg: Dict[str, str]) -> str:
+    return "row_count" if agg["column"] == "*" else f"{agg['func']}_{agg['column']}"
+
+
+def execute_query(query: Dict[str, Any], df: pd.DataFrame) -> pd.DataFrame:
+    """Run a validated query with vectorized pandas operations; at most `limit` rows come back."""
+    mask = pd.Series(True, index=df.index)
+    for item in query["filters"]:
+        mask &= _filter_mask(df, item).fillna(False).astype(bool)
+    filtered = df[mask]
+
+    aggregations = query["aggregations"]
+    group_by = query["group_by"]
+    if aggregations:
+        if group_by:
+            grouped = filtered.groupby(group_by, dropna=False, observed=True)
+            parts = {}
+            for agg in aggregations:
+                if agg["column"] == "*":
+                    parts[_aggregate_name(agg)] = grouped.size()
+                else:
+                    parts[_aggregate_name(agg)] = grouped[agg["column"]].agg(agg["func"])
+            result = pd.DataFrame(parts).reset_index()
+        else:
+            row = {}
+            for agg in aggregations:
+                if agg["column"] == "*":
+                    row[_aggregate_name(agg)] = len(filtered)
+                else:
+                    row[_aggregate_name(agg)] = filtered[agg["column"]].agg(agg["func"])
+            result = pd.DataFrame([row])
+    elif group_by:
+        result = filtered.groupby(group_by, dropna=False, observed=True).size().rename("row_count").reset_index()
+    else:
+        result = filtered
+
+    sort = query["sort"]
+    if sort:
+        by = sort["by"]
+        if by not in result.columns:
+            # The planner may name the source column of an aggregate
+            candidates = [col for col in result.columns if str(col).endswith(f"_{by}")]
+            if not candidates:
+                raise QueryError(f"Cannot sort by {by!r}")
+            by = candidates[0]
+        result = result.sort_values(by, ascending=not sort.get("descending", False))
+
+    return result.head(query["limit"])
+
+
+def describe_columns(df: pd.DataFrame, example_values: int = 8) -> List[Dict[str, Any]]:
+    """Compact schema for the planner prompt: name, dtype and a few values of text columns."""
+    schema = []
+    for col in df.columns:
+        entry = {"column": str(col), "dtype": str(df[col].dtype)}
+        if not pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            entry["examples"] = [str(value) for value in df[col].value_counts().index[:example_values]]
+        schema.append(entry)
+    return schema
@@ -1,7 +1,8 @@
 # services/stt.py
+import time
 import assemblyai as aai
 from fastapi import UploadFile
-from config import get_api_key
+from config import get_api_key, ASSEMBLYAI_STREAMING_HOST
 from assemblyai.streaming.v3 import (
     StreamingClient,
     StreamingClientOptions,
@@ -42,6 +43,10 @@ class AssemblyAIStreamingTranscriber:
     Wrapper around AAI StreamingClient that exposes:
       - on_partial_callback(text) for interim results
       - on_final_callback(text)   when end_of_turn=True
+
+    Connecting blocks until the upstream handshake completes. A connected
+    transcriber can be created ahead of time and handed to a voice session
+    later with attach(); see services/transcriber_pool.py.
     """
 
     def __init__(
@@ -52,16 +57,20 @@ class AssemblyAIStreamingTranscriber:
     ):
         self.on_partial_callback = on_partial_callback
         self.on_final_callback = on_final_callback
+        # Set once the session ends or fails; a closed transcriber cannot be reused
+        self.closed = False
+        self._formatting_turns = False
 
         # Ensure API key is configured
         api_key = _configure_assemblyai()
         if not api_key:
             raise Exception("ASSEMBLYAI_API_KEY not configured")
+        self.api_key = api_key
 
         self.client = StreamingClient(
             StreamingClientOptions(
                 api_key=api_key,
-                api_host="streaming.assemblyai.com",
+                api_host=ASSEMBLYAI_STREAMING_HOST,
             )
         )
 
@@ -69,6 +78,8 @@ class AssemblyAIStreamingTranscriber:
         self.client.on(StreamingEvents.Begin, _on_begin)
         self.client.on(StreamingEvents.Error, _on_error)
         self.client.on(StreamingEvents.Termination, _on_termination)
+        self.client.on(StreamingEvents.Error, lambda client, error: self._mark_closed())
+        self.client.on(StreamingEvents.Termination, lambda client, event: self._mark_closed())
         self.client.on(
             StreamingEvents.Turn,
             lambda client, event: self._on_turn(client, event),
@@ -80,6 +91,18 @@ class AssemblyAIStreamingTranscriber:
                 format_turns=False,
             )
         )
+        self.connected_at = time.monotonic()
+
+    def _mark_closed(self):
+        self.closed = True
+
+    def attach(self, on_partial_callback=None, on_final_callback=None):
+        """Hand a pre-connected transcriber to a new voice session."""
+        self.on_partial_callback = on_partial_callback
+        self.on_final_callback = on_final_callback
+        if self._formatting_turns:
+            self.client.set_params(StreamingSessionParameters(format_turns=False))
+            self._formatting_turns = False
 
     def _on_turn(self, client: StreamingClient, event: TurnEvent):
         text = (event.transcript or "").strip()
@@ -96,6 +119,7 @@ class AssemblyAIStreamingTranscriber:
             if not event.turn_is_formatted:
                 try:
                     client.set_params(StreamingSessionParameters(format_turns=True))
+                    self._formatting_turns = True
                 except Exception as set_err:
                     print("set_params error:", set_err)
         else:
@@ -107,6 +131,7 @@ class AssemblyAIStreamingTranscriber:
         self.client.stream(audio_chunk)
 
     def close(self):
+        self.closed = True
         self.client.disconnect(terminate=True)
 
 
@@ -0,0 +1,208 @@
+# services/transcriber_pool.py
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from config import get_api_key, register_key_change_listener, STT_POOL_SIZE, STT_POOL_MAX_IDLE_SECONDS
+from services.stt import AssemblyAIStreamingTranscriber
+
+logger = logging.getLogger(__name__)
+
+# Pause between refill attempts after a session failed to connect
+_RETRY_DELAY_SECONDS = 5.0
+
+
+class TranscriberPool:
+    """
+    Keeps up to `size` connected AssemblyAI streaming sessions warm while
+    voice WebSockets are active.
+
+    A new voice WebSocket takes a connected transcriber from the pool instead
+    of waiting for the upstream handshake; a background thread replaces it.
+    Streaming is billed by session duration, so sessions are only kept warm
+    while at least one voice socket holds a transcriber, and are closed when
+    the last one is released. Warm sessions that were never used within
+    `max_idle_seconds`, that the server closed, or that were opened with an API
+    key that has since changed are discarded. When the pool is empty the
+    transcriber is connected on a worker thread, so the event loop never
+    blocks on the handshake.
+    """
+
+    def __init__(self, size: int, max_idle_seconds: float,
+                 factory: Callable[[], AssemblyAIStreamingTranscriber] = AssemblyAIStreamingTranscriber):
+        self.size = max(0, size)
+        self.max_idle_seconds = max_idle_seconds
+        self.factory = factory
+        self._idle: Deque[AssemblyAIStreamingTranscriber] = deque()
+        # Sessions waiting to be closed by the refill thread; closing blocks
+        # until the server confirms termination
+        self._retired: List[AssemblyAIStreamingTranscriber] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        # Voice sockets currently holding a transcriber
+        self._active = 0
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        """Start the background refill thread (idempotent; a no-op when size is 0)."""
+        with self._lock:
+            if self.size == 0 or self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="stt-pool", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop refilling and close every warm session."""
+        with self._lock:
+            self._stopped = True
+            thread, self._thread = self._thread, None
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout=10)
+        with self._lock:
+            closing = list(self._idle) + self._retired
+            self._idle.clear()
+            self._retired = []
+        for transcriber in closing:
+            self._close(transcriber)
+
+    def drain(self):
+        """Retire every warm session, e.g. after the API key changed."""
+        with self._lock:
+            self._retired.extend(self._idle)
+            self._idle.clear()
+        self._wakeup.set()
+
+    def _usable(self, transcriber: AssemblyAIStreamingTranscriber, api_key: Optional[str]) -> bool:
+        return (
+            not transcriber.closed
+            and transcriber.api_key == api_key
+            and time.monotonic() - transcriber.connected_at <= self.max_idle_seconds
+        )
+
+    def _take(self) -> Optional[AssemblyAIStreamingTranscriber]:
+        api_key = get_api_key("ASSEMBLYAI_API_KEY")
+        with self._lock:
+            while self._idle:
+                transcriber = self._idle.popleft()
+                if self._usable(transcriber, api_key):
+                    return transcriber
+                self._retired.append(transcriber)
+        return None
+
+    async def acquire(self, on_partial_callback=None, on_final_callback=None) -> AssemblyAIStreamingTranscriber:
+        """Return a connected transcriber wired to the given callbacks; pair with release()."""
+        transcriber = self._take()
+        with self._lock:
+            self._active += 1
+            if transcriber is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._wakeup.set()
+        if transcriber is None:
+            try:
+                transcriber = await asyncio.get_running_loop().run_in_executor(None, self.factory)
+            except BaseException:
+                self._release_slot()
+                raise
+        transcriber.attach(on_partial_callback, on_final_callback)
+        return transcriber
+
+    async def release(self, transcriber: AssemblyAIStreamingTranscriber):
+        """Close a transcriber from acquire(); the last release lets the warm sessions go."""
+        self._release_slot()
+        await asyncio.get_running_loop().run_in_executor(None, self._close, transcriber)
+
+    def _release_slot(self):
+        with self._lock:
+            self._active -= 1
+            idle = self._active == 0
+        if idle:
+            self.drain()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.clear()
+            with self._lock:
+                retired, self._retired = self._retired, []
+            for transcriber in retired:
+                self._close(transcriber)
+            delay = self._refill()
+            self._wakeup.wait(timeout=delay)
+
+    def _refill(self) -> float:
+        """Drop stale sessions and connect new ones; returns seconds until the next check."""
+        api_key = get_api_key("ASSEMBLYAI_API_KEY")
+        stale = []
+        with self._lock:
+            fresh = deque()
+            for transcriber in self._idle:
+                (fresh if self._usable(transcriber, api_key) else stale).append(transcriber)
+            self._idle = fresh
+        for transcriber in stale:
+            self._close(transcriber)
+
+        if not api_key or self._active == 0:
+            # Nothing to connect with until a key is configured or a voice
+            # socket opens; set_api_keys and acquire() wake us
+            return self.max_idle_seconds
+
+        while not self._stopped and self._active > 0 and len(self._idle) < self.size:
+            try:
+                transcriber = self.factory()
+            except Exception as e:
+                logger.warning(f"Could not pre-connect a streaming transcriber: {e}")
+                return _RETRY_DELAY_SECONDS
+            if transcriber.closed:
+                logger.warning("Pre-connected streaming transcriber was closed by the server")
+                return _RETRY_DELAY_SECONDS
+            with self._lock:
+                keep = not self._stopped and self._active > 0
+                if keep:
+                    self._idle.append(transcriber)
+            if not keep:
+                self._close(transcriber)
+
+        # Come back when the oldest warm session is due to be replaced
+        with self._lock:
+            if not self._idle:
+                return self.max_idle_seconds
+            oldest = min(transcriber.connected_at for transcriber in self._idle)
+        return max(1.0, oldest + self.max_idle_seconds - time.monotonic())
+
+    @staticmethod
+    def _close(transcriber: AssemblyAIStreamingTranscriber):
+        try:
+            transcriber.close()
+        except Exception as e:
+            logger.debug(f"Error closing streaming transcriber: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "active": self._active,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Global instance
+transcriber_pool = TranscriberPool(STT_POOL_SIZE, STT_POOL_MAX_IDLE_SECONDS)
+
+
+def _on_key_change(changed):
+    if "ASSEMBLYAI_API_KEY" in changed:
+        transcriber_pool.drain()
+
+
+register_key_change_listener(_on_key_change)
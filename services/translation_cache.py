@@ -0,0 +1,80 @@
+# services/translation_cache.py
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from config import TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL_SECONDS
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC with runs of whitespace collapsed, so trivially different inputs share an entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationCache:
+    """
+    LRU cache of translations keyed by (normalized text, target language).
+
+    Holds at most `max_entries` translations; entries older than `ttl_seconds`
+    are treated as misses and dropped. Safe to use from worker threads.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text: str, target_language: str) -> Tuple[str, str]:
+        return normalize_text(text), target_language.lower()
+
+    def get(self, text: str, target_language: str) -> Optional[str]:
+        key = self.make_key(text, target_language)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, translation = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return translation
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, text: str, target_language: str, translation: str):
+        if self.max_entries <= 0 or not translation:
+            return
+        key = self.make_key(text, target_language)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), translation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+# Global instance
+translation_cache = TranslationCache(TRANSLATION_CACHE_SIZE, TRANSLATION_CACHE_TTL_SECONDS)
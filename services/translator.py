@@ -1,8 +1,11 @@
 # services/translator.py
-import google.generativeai as genai
-from typing import Dict, List
+from typing import Dict, Any, List, Optional, Tuple
+import json
 import logging
 import config
+from services.clients import get_gemini_model
+from services.translation_cache import translation_cache
+from services.language_detect import detect_language_locally
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +16,7 @@ def _get_configured_model():
         raise Exception("GEMINI_API_KEY not configured. Please set it in the configuration.")
     
     try:
-        genai.configure(api_key=api_key)
-        return genai.GenerativeModel('gemini-1.5-flash')
+        return get_gemini_model(api_key)
     except Exception as e:
         raise Exception(f"Failed to configure Gemini model: {str(e)}")
 
@@ -34,6 +36,109 @@ SUPPORTED_LANGUAGES = {
     "arabic": "ar"
 }
 
+def _unsupported(target_language: str) -> Dict[str, str]:
+    return {
+        "success": False,
+        "error": f"Language '{target_language}' not supported. Available: {list(SUPPORTED_LANGUAGES.keys())}"
+    }
+
+def _translate_one(model, text: str, target_language: str) -> str:
+    prompt = f"""
+        Translate the following text to {target_language}. 
+        Provide ONLY the translation, no explanations or additional text.
+        
+        Text to translate: "{text}"
+        """
+    
+    response = model.generate_content(prompt)
+    
+    if not response or not response.text:
+        raise Exception("Empty response from Gemini API")
+        
+    translated_text = response.text.strip()
+    
+    if not translated_text:
+        raise Exception("Translation returned empty text")
+    return translated_text
+
+def _translate_many(model, items: List[Tuple[str, str]]) -> Dict[int, str]:
+    """Translate several (text, target language) items in one call with JSON output."""
+    payload = [{"id": i, "text": text, "target_language": language} for i, (text, language) in enumerate(items)]
+    prompt = f"""
+        Translate each item's text into its target_language.
+        Reply with ONLY a JSON array of objects {{"id": <id>, "translation": "<translated text>"}},
+        one per item, with no explanations.
+        
+        Items: {json.dumps(payload, ensure_ascii=False)}
+        """
+    
+    response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+    if not response or not response.text:
+        raise Exception("Empty response from Gemini API")
+    
+    translations = {}
+    for entry in json.loads(response.text):
+        try:
+            translation = str(entry["translation"]).strip()
+            if translation:
+                translations[int(entry["id"])] = translation
+        except (KeyError, TypeError, ValueError):
+            continue
+    return translations
+
+def _translate_requests(requests: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Translate (text, target language) pairs, serving repeats from the cache and
+    sending all misses to Gemini in a single call.
+    """
+    translations: List[Optional[str]] = [translation_cache.get(text, language) for text, language in requests]
+    cached = [translation is not None for translation in translations]
+    
+    # Identical misses are translated once
+    pending: Dict[Tuple[str, str], List[int]] = {}
+    for index, (text, language) in enumerate(requests):
+        if translations[index] is None:
+            pending.setdefault(translation_cache.make_key(text, language), []).append(index)
+    
+    error = None
+    if pending:
+        try:
+            model = _get_configured_model()
+            keys = list(pending)
+            if len(keys) == 1:
+                results = {0: _translate_one(model, *keys[0])}
+            else:
+                results = _translate_many(model, keys)
+            for i, key in enumerate(keys):
+                translation = results.get(i)
+                if translation is None:
+                    continue
+                translation_cache.put(key[0], key[1], translation)
+                for index in pending[key]:
+                    translations[index] = translation
+        except Exception as e:
+            logger.error(f"Translation error: {e}")
+            error = str(e)
+    
+    results = []
+    for index, (text, language) in enumerate(requests):
+        if translations[index] is None:
+            results.append({
+                "success": False,
+                "error": f"Translation failed: {error or 'no translation returned'}"
+            })
+            continue
+        results.append({
+            "success": True,
+            "original_text": text,
+            "translated_text": translations[index],
+            "source_language": "english",
+            "target_language": language,
+            "language_code": SUPPORTED_LANGUAGES[language.lower()],
+            "cached": cached[index]
+        })
+    return results
+
 def translate_text(text: str, target_language: str) -> Dict[str, str]:
     """
     Translate text to target language using Gemini AI.
@@ -45,47 +150,25 @@ def translate_text(text: str, target_language: str) -> Dict[str, str]:
     Returns:
         Dict with original text, translated text, and language info
     """
-    try:
-        if target_language.lower() not in SUPPORTED_LANGUAGES:
-            return {
-                "success": False,
-                "error": f"Language '{target_language}' not supported. Available: {list(SUPPORTED_LANGUAGES.keys())}"
-            }
-        
-        model = _get_configured_model()
-        
-        prompt = f"""
-        Translate the following text to {target_language}. 
-        Provide ONLY the translation, no explanations or additional text.
-        
-        Text to translate: "{text}"
-        """
-        
-        response = model.generate_content(prompt)
-        
-        if not response or not response.text:
-            raise Exception("Empty response from Gemini API")
-            
-        translated_text = response.text.strip()
-        
-        if not translated_text:
-            raise Exception("Translation returned empty text")
-        
-        return {
-            "success": True,
-            "original_text": text,
-            "translated_text": translated_text,
-            "source_language": "english",
-            "target_language": target_language,
-            "language_code": SUPPORTED_LANGUAGES[target_language.lower()]
-        }
-        
-    except Exception as e:
-        logger.error(f"Translation error: {e}")
-        return {
-            "success": False,
-            "error": f"Translation failed: {str(e)}"
-        }
+    if target_language.lower() not in SUPPORTED_LANGUAGES:
+        return _unsupported(target_language)
+    return _translate_requests([(text, target_language)])[0]
+
+def translate_batch(texts: List[str], target_language: str) -> List[Dict[str, Any]]:
+    """
+    Translate many segments (e.g. the sentences of a reply) into one language
+    with at most one Gemini call. Results are in input order and have the same
+    shape as translate_text's.
+    """
+    if target_language.lower() not in SUPPORTED_LANGUAGES:
+        return [_unsupported(target_language) for _ in texts]
+    return _translate_requests([(text, target_language) for text in texts])
+
+def translate_to_languages(text: str, target_languages: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Translate one text into several languages with at most one Gemini call."""
+    supported = [language for language in target_languages if language.lower() in SUPPORTED_LANGUAGES]
+    translated = dict(zip(supported, _translate_requests([(text, language) for language in supported]))) if supported else {}
+    return {language: translated.get(language) or _unsupported(language) for language in target_languages}
 
 def get_supported_languages() -> List[str]:
     """Return list of supported languages."""
@@ -93,7 +176,11 @@ def get_supported_languages() -> List[str]:
 
 def detect_language(text: str) -> str:
     """
-    Detect the language of input text using Gemini AI.
+    Detect the language of input text.
+    
+    Confident cases are settled offline by script and character n-gram
+    analysis; Gemini is only asked when the local confidence is below
+    LANGUAGE_DETECT_CONFIDENCE.
     
     Args:
         text: Text to analyze
@@ -101,6 +188,12 @@ def detect_language(text: str) -> str:
     Returns:
         Detected language name
     """
+    local_language, confidence = detect_language_locally(text)
+    if local_language and confidence >= config.LANGUAGE_DETECT_CONFIDENCE:
+        return local_language
+    # A better-than-even local guess beats defaulting to English if Gemini fails
+    fallback = local_language if local_language and confidence >= 0.5 else "english"
+    
     try:
         model = _get_configured_model()
         
@@ -118,8 +211,8 @@ def detect_language(text: str) -> str:
         if detected_lang in SUPPORTED_LANGUAGES:
             return detected_lang
         else:
-            return "english"  # Default fallback
+            return fallback
             
     except Exception as e:
         logger.error(f"Language detection error: {e}")
-        return "english"  # Default fallback
+        return fallback
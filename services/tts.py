@@ -1,52 +1,55 @@
 # services/tts.py
-import requests
-from typing import List, Dict, Any
+import asyncio
+from typing import List, Dict, Any, Awaitable, Callable, Optional
 from config import get_api_key # Import the key from config
-from murf import Murf
-from pathlib import Path
+from config import TTS_MAX_CONCURRENCY, TTS_CONNECTION_CONCURRENCY
+from services.audio_cache import tts_cache
+from services.audio_sink import AudioSink, ChunkListener
+from services.clients import get_murf_client, murf_clients
 import logging
-import os
 
 logger = logging.getLogger(__name__)
 
 MURF_API_URL = "https://api.murf.ai/v1/speech"
 
-# Ensure uploads folder exists
-UPLOADS_DIR = Path(__file__).resolve().parent.parent / "uploads"
-UPLOADS_DIR.mkdir(exist_ok=True)
-
-
-def speak(text: str, output_file: str = "stream_output.wav"):
+def synthesize(text: str, voice_id: str, style: str, api_key: str, on_chunk: Optional[ChunkListener] = None) -> bytes:
     """
-    Convert text to speech using Murf API and save audio in uploads folder.
+    Stream speech from Murf into an AudioSink and return the whole clip.
+    Repeated phrases are served from the cache. on_chunk, if given, receives
+    the audio as it arrives (a cached clip arrives as a single chunk).
     """
-    api_key = get_api_key("MURF_API_KEY")
-    if not api_key:
-        logger.warning("MURF_API_KEY not configured")
-        return None
-    
-    client = Murf(api_key=api_key)
-
-    file_path = UPLOADS_DIR / output_file
+    cache_key = tts_cache.make_key(text, voice_id, style)
+    cached = tts_cache.get(cache_key)
+    if cached is not None:
+        if on_chunk is not None:
+            on_chunk(cached)
+        return cached
 
-    # Start with a clean file
-    open(file_path, "wb").close()
+    client = get_murf_client(api_key)
 
     res = client.text_to_speech.stream(
         text=text,
-        voice_id="en-US-ken",
-        style="Conversational"
+        voice_id=voice_id,
+        style=style
     )
 
-    audio_bytes = b""
-    for audio_chunk in res:
-        audio_bytes += audio_chunk
-        with open(file_path, "ab") as f:
-            f.write(audio_chunk)
-
+    audio_bytes = AudioSink(on_chunk).consume(res)
+    tts_cache.put(cache_key, audio_bytes)
     return audio_bytes
 
 
+def speak(text: str, on_chunk: Optional[ChunkListener] = None):
+    """
+    Convert text to speech using Murf API and return the audio bytes.
+    """
+    api_key = get_api_key("MURF_API_KEY")
+    if not api_key:
+        logger.warning("MURF_API_KEY not configured")
+        return None
+
+    return synthesize(text, "en-US-ken", "Conversational", api_key, on_chunk)
+
+
 def convert_text_to_speech(text: str, voice_id: str = "en-US-natalie") -> str:
     """Converts text to speech using Murf AI."""
     api_key = get_api_key("MURF_API_KEY")
@@ -60,7 +63,7 @@ def convert_text_to_speech(text: str, voice_id: str = "en-US-natalie") -> str:
         "format": "MP3",
         "volume": "100%"
     }
-    response = requests.post(f"{MURF_API_URL}/generate", json=payload, headers=headers)
+    response = murf_clients.get_session().post(f"{MURF_API_URL}/generate", json=payload, headers=headers)
     response.raise_for_status()
     response_data = response.json()
     return response_data.get("audioFile")
@@ -73,6 +76,74 @@ def get_available_voices() -> List[Dict[str, Any]]:
         raise Exception("MURF_API_KEY not configured.")
 
     headers = {"Accept": "application/json", "api-key": api_key}
-    response = requests.get(f"{MURF_API_URL}/voices", headers=headers)
+    response = murf_clients.get_session().get(f"{MURF_API_URL}/voices", headers=headers)
     response.raise_for_status()
-    return response.json()
\ No newline at end of file
+    return response.json()
+
+
+# Shared across all connections; created lazily inside the running event loop
+_process_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_process_semaphore() -> asyncio.Semaphore:
+    global _process_semaphore
+    if _process_semaphore is None:
+        _process_semaphore = asyncio.Semaphore(max(1, TTS_MAX_CONCURRENCY))
+    return _process_semaphore
+
+
+class SynthesisPipeline:
+    """
+    Bounded concurrent TTS stage that delivers audio strictly in submit order.
+
+    Sentences are synthesized in worker threads, at most `concurrency` at a time
+    for this pipeline and TTS_MAX_CONCURRENCY across the process. Results are
+    handed to on_audio(sentence_index, audio_bytes) in the order the sentences
+    were submitted.
+    """
+
+    def __init__(self, on_audio: Callable[[int, bytes], Awaitable[None]], concurrency: Optional[int] = None):
+        if concurrency is None:
+            concurrency = TTS_CONNECTION_CONCURRENCY
+        self.concurrency = max(1, min(concurrency, TTS_MAX_CONCURRENCY))
+        self.on_audio = on_audio
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._pending: asyncio.Queue = asyncio.Queue()
+        self._deliverer = asyncio.ensure_future(self._deliver())
+
+    async def _synthesize(self, sentence: str) -> Optional[bytes]:
+        loop = asyncio.get_running_loop()
+        async with self._semaphore, _get_process_semaphore():
+            try:
+                return await loop.run_in_executor(None, speak, sentence)
+            except Exception as e:
+                logger.error(f"TTS synthesis failed for sentence: {e}")
+                return None
+
+    async def _deliver(self):
+        sentence_index = 0
+        while True:
+            task = await self._pending.get()
+            if task is None:
+                return
+            audio_bytes = await task
+            if audio_bytes:
+                await self.on_audio(sentence_index, audio_bytes)
+            sentence_index += 1
+
+    def submit(self, sentence: str):
+        """Schedule a sentence for synthesis."""
+        self._pending.put_nowait(asyncio.ensure_future(self._synthesize(sentence)))
+
+    async def drain(self):
+        """Wait until every submitted sentence has been delivered."""
+        self._pending.put_nowait(None)
+        await self._deliverer
+
+    def cancel(self):
+        """Abandon outstanding synthesis, e.g. when the client disconnects."""
+        self._deliverer.cancel()
+        while not self._pending.empty():
+            task = self._pending.get_nowait()
+            if task is not None:
+                task.cancel()
@@ -0,0 +1,163 @@
+# services/uploads.py
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi import Request
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from config import UPLOAD_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Raw uploads are spooled to the system temp directory: uploads/ is served
+# publicly, and STATE_DIR's persistent disk is budgeted for parsed state
+INCOMING_DIR = Path(tempfile.gettempdir()) / "voice-agent-incoming"
+INCOMING_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+
+# Allowance for multipart boundaries and part headers when checking Content-Length
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadError(ValueError):
+    """Raised when a request does not carry the expected file upload."""
+
+
+class UploadTooLarge(UploadError):
+    """Raised when an upload exceeds the configured size cap."""
+
+
+class SpooledUpload:
+    """A file part received straight to disk: its temporary path, client filename, size and SHA-256."""
+
+    def __init__(self, path: Path, filename: str, size: int, sha256: str = ""):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+
+
+class _FilePartWriter:
+    """MultipartParser callbacks that write one named file part to a temporary file."""
+
+    def __init__(self, field: str, max_bytes: int, allowed_suffixes: Optional[Iterable[str]] = None):
+        self.field = field
+        self.max_bytes = max_bytes
+        self.allowed_suffixes = allowed_suffixes
+        self.upload: Optional[SpooledUpload] = None
+        self._file = None
+        self._digest = hashlib.sha256()
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda data, start, end: self._append("_header_field", data[start:end]),
+            "on_header_value": lambda data, start, end: self._append("_header_value", data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _append(self, attr: str, data: bytes):
+        setattr(self, attr, getattr(self, attr) + data)
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        name = options.get(b"name", b"").decode("latin-1")
+        filename = options.get(b"filename")
+        if name != self.field or filename is None or self.upload is not None:
+            return
+        filename = Path(filename.decode("utf-8", "replace")).name
+        if self.allowed_suffixes is not None and Path(filename).suffix.lower() not in self.allowed_suffixes:
+            raise UploadError(f"Unsupported file type. Allowed: {', '.join(self.allowed_suffixes)}")
+        fd, tmp_name = tempfile.mkstemp(dir=INCOMING_DIR, suffix=Path(filename).suffix)
+        self._file = os.fdopen(fd, "wb")
+        self.upload = SpooledUpload(Path(tmp_name), filename, 0)
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._file is None:
+            return
+        self.upload.size += end - start
+        if self.upload.size > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit")
+        chunk = data[start:end]
+        self._digest.update(chunk)
+        self._file.write(chunk)
+
+    def _on_part_end(self):
+        if self._file is not None:
+            self.upload.sha256 = self._digest.hexdigest()
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+async def receive_upload(request: Request, field: str = "file", max_bytes: int = UPLOAD_MAX_BYTES,
+                         allowed_suffixes: Optional[Iterable[str]] = None) -> SpooledUpload:
+    """
+    Receive a multipart/form-data request body and write its `field` file part
+    straight to a temporary file as the body arrives, hashing it on the way
+    (SpooledUpload.sha256 keys the dataset store).
+
+    The size cap is enforced from Content-Length before anything is read and
+    again on the bytes received, so an oversized upload is rejected without
+    being stored. The file is written once, with no intermediate spooled copy.
+    A file whose suffix is not in `allowed_suffixes` is rejected from its part
+    headers, before its data is read. The caller owns the returned path and should remove it with
+    discard_spooled() once processed.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + _MULTIPART_OVERHEAD_BYTES:
+        raise UploadTooLarge(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+    content_type, options = parse_options_header(request.headers.get("content-type"))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadError("Expected a multipart/form-data upload")
+
+    writer = _FilePartWriter(field, max_bytes, allowed_suffixes)
+    parser = MultipartParser(boundary, writer.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+    except BaseException as e:
+        writer.close()
+        if writer.upload is not None:
+            discard_spooled(writer.upload.path)
+        if isinstance(e, FormParserError):
+            raise UploadError(f"Malformed multipart upload: {e}") from e
+        raise
+    writer.close()
+    if writer.upload is None:
+        raise UploadError(f"No file in the '{field}' form field")
+    return writer.upload
+
+
+def discard_spooled(path: Path):
+    """Remove a spooled upload, ignoring files that are already gone."""
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove spooled upload {path}: {e}")
@@ -1,17 +1,11 @@
 # services/voice_changer.py
-import requests
 from typing import Dict, Any
-from config import MURF_API_KEY
-from murf import Murf
-from pathlib import Path
+from config import get_api_key
+from services.tts import synthesize
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Ensure uploads folder exists
-UPLOADS_DIR = Path(__file__).resolve().parent.parent / "uploads"
-UPLOADS_DIR.mkdir(exist_ok=True)
-
 # Voice personas with their characteristics
 VOICE_PERSONAS = {
     "shinchan": {
@@ -112,7 +106,7 @@ def get_voice_for_language_and_persona(language: str, persona: str) -> str:
     
     return LANGUAGE_VOICES[language][persona]
 
-def apply_voice_effects(text: str, persona: str, language: str = "english", output_file: str = "voice_output.wav") -> bytes:
+def apply_voice_effects(text: str, persona: str, language: str = "english") -> bytes:
     """
     Apply voice effects based on persona and language.
     
@@ -120,69 +114,38 @@ def apply_voice_effects(text: str, persona: str, language: str = "english", outp
         text: Text to convert to speech
         persona: Voice persona ('shinchan', 'robot', 'deep_voice', 'normal')
         language: Target language for speech
-        output_file: Output file name
     
     Returns:
         Audio bytes
     """
     try:
-        if not MURF_API_KEY:
+        api_key = get_api_key("MURF_API_KEY")
+        if not api_key:
             raise Exception("MURF_API_KEY not configured.")
         
-        client = Murf(api_key=MURF_API_KEY)
-        file_path = UPLOADS_DIR / output_file
-        
         # Get voice ID for language and persona
         voice_id = get_voice_for_language_and_persona(language, persona)
         
         # Get persona settings
         persona_settings = VOICE_PERSONAS.get(persona.lower(), VOICE_PERSONAS["normal"])
         
-        # Clean file
-        open(file_path, "wb").close()
-        
         # Generate speech with persona effects
-        res = client.text_to_speech.stream(
-            text=text,
-            voice_id=voice_id,
-            style=persona_settings["style"]
-        )
-        
-        audio_bytes = b""
-        for audio_chunk in res:
-            audio_bytes += audio_chunk
-            with open(file_path, "ab") as f:
-                f.write(audio_chunk)
-        
+        audio_bytes = synthesize(text, voice_id, persona_settings["style"], api_key)
         logger.info(f"Generated {persona} voice in {language} for text: {text[:50]}...")
         return audio_bytes
         
     except Exception as e:
         logger.error(f"Voice generation error: {e}")
         # Fallback to normal voice
-        return generate_fallback_voice(text, output_file)
+        return generate_fallback_voice(text)
 
-def generate_fallback_voice(text: str, output_file: str = "fallback_output.wav") -> bytes:
+def generate_fallback_voice(text: str) -> bytes:
     """Generate fallback voice when main generation fails."""
     try:
-        client = Murf(api_key=MURF_API_KEY)
-        file_path = UPLOADS_DIR / output_file
-        
-        open(file_path, "wb").close()
-        
-        res = client.text_to_speech.stream(
-            text=text,
-            voice_id="en-US-natalie",
-            style="Conversational"
-        )
-        
-        audio_bytes = b""
-        for audio_chunk in res:
-            audio_bytes += audio_chunk
-            with open(file_path, "ab") as f:
-                f.write(audio_chunk)
-        
-        return audio_bytes
+        api_key = get_api_key("MURF_API_KEY")
+        if not api_key:
+            raise Exception("MURF_API_KEY not configured.")
+        return synthesize(text, "en-US-natalie", "Conversational", api_key)
         
     except Exception as e:
         logger.error(f"Fallback voice generation failed: {e}")
@@ -2,32 +2,45 @@
 """
 Startup script for Render deployment.
 This ensures the FastAPI app binds correctly to 0.0.0.0.
+
+Set WORKERS to run several worker processes; they share runtime API keys and
+session datasets through STATE_DIR (see config.py).
 """
 import os
 import sys
 import uvicorn
-from main import app
 
 def main():
     """Start the server with explicit configuration."""
     port = int(os.environ.get("PORT", 8000))
     host = "0.0.0.0"
-    
+    workers = max(1, int(os.environ.get("WORKERS", "1")))
+
+    if workers > 1:
+        # Split the PDF extraction pool between workers instead of giving each one every core
+        os.environ.setdefault("PDF_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+    # Imported after the environment is final; worker processes re-import it
+    import config
+    # Keys set at runtime last as long as the server run, as with a single worker
+    config.reset_shared_state()
+
     print(f"=== Render Deployment Startup ===")
     print(f"Host: {host}")
     print(f"Port: {port}")
+    print(f"Workers: {workers}")
     print(f"Environment PORT: {os.environ.get('PORT', 'Not set')}")
     print(f"Python version: {sys.version}")
     print("===================================")
-    
-    # Start the server
+
+    # Start the server; multiple workers need the app as an import string
     uvicorn.run(
-        app,
+        "main:app",
         host=host,
         port=port,
         log_level="info",
         access_log=True,
-        workers=1
+        workers=workers
     )
 
 if __name__ == "__main__":
@@ -56,6 +56,13 @@ document.addEventListener("DOMContentLoaded", () => {
   let chatSessions = JSON.parse(localStorage.getItem('chatSessions') || '{}');
   let chatCounter = Object.keys(chatSessions).length;
   
+  // Identifies this browser's dataset on the server; shared with the persona page
+  let datasetSessionId = localStorage.getItem('datasetSessionId');
+  if (!datasetSessionId) {
+    datasetSessionId = crypto.randomUUID().replace(/-/g, '');
+    localStorage.setItem('datasetSessionId', datasetSessionId);
+  }
+  
   // Configuration settings
   let appSettings = JSON.parse(localStorage.getItem('appSettings') || '{}');
   let apiKeys = JSON.parse(localStorage.getItem('apiKeys') || '{}');
@@ -190,13 +197,23 @@ document.addEventListener("DOMContentLoaded", () => {
     saveChatSession();
   };
 
+  // Binary audio frames carry an 8-byte header (version, sequence, sentence
+  // index, format) followed by the raw audio bytes.
+  const AUDIO_FRAME_HEADER_SIZE = 8;
+
+  // Queue entries are either base64 strings (JSON audio messages) or
+  // ArrayBuffers (binary audio frames with the header already stripped).
+  const toAudioBuffer = (item) => {
+    if (typeof item === "string") {
+      return Uint8Array.from(atob(item), (c) => c.charCodeAt(0)).buffer;
+    }
+    return item;
+  };
+
   const playNextInQueue = () => {
     if (audioQueue.length > 0) {
       isPlaying = true;
-      const base64Audio = audioQueue.shift();
-      const audioData = Uint8Array.from(atob(base64Audio), (c) =>
-        c.charCodeAt(0)
-      ).buffer;
+      const audioData = toAudioBuffer(audioQueue.shift());
 
       audioContext
         .decodeAudioData(audioData)
@@ -239,9 +256,17 @@ document.addEventListener("DOMContentLoaded", () => {
       };
 
       const wsProtocol = window.location.protocol === "https:" ? "wss:" : "ws:";
-      ws = new WebSocket(`${wsProtocol}//${window.location.host}/ws`);
+      ws = new WebSocket(`${wsProtocol}//${window.location.host}/ws?audio_framing=binary&session_id=${datasetSessionId}`);
+      ws.binaryType = "arraybuffer";
 
       ws.onmessage = (event) => {
+        if (event.data instanceof ArrayBuffer) {
+          audioQueue.push(event.data.slice(AUDIO_FRAME_HEADER_SIZE));
+          if (!isPlaying) {
+            playNextInQueueEnhanced();
+          }
+          return;
+        }
         const msg = JSON.parse(event.data);
         if (msg.type === "assistant") {
           // Changed from "llm" to "assistant"
@@ -285,7 +310,7 @@ document.addEventListener("DOMContentLoaded", () => {
     uploadStatus.className = 'upload-status';
     
     try {
-      const response = await fetch('/upload', {
+      const response = await fetch(`/upload?session_id=${datasetSessionId}`, {
         method: 'POST',
         body: formData
       });
@@ -378,7 +403,8 @@ document.addEventListener("DOMContentLoaded", () => {
         },
         body: JSON.stringify({
           message: text,
-          chat_id: currentChatId
+          chat_id: currentChatId,
+          session_id: datasetSessionId
         })
       });
 
@@ -728,10 +754,7 @@ document.addEventListener("DOMContentLoaded", () => {
   const playNextInQueueEnhanced = () => {
     if (audioQueue.length > 0 && appSettings.autoPlay) {
       isPlaying = true;
-      const base64Audio = audioQueue.shift();
-      const audioData = Uint8Array.from(atob(base64Audio), (c) =>
-        c.charCodeAt(0)
-      ).buffer;
+      const audioData = toAudioBuffer(audioQueue.shift());
 
       audioContext
         .decodeAudioData(audioData)